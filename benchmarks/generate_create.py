@@ -0,0 +1,92 @@
+"""Compare the generated model creation functions with ParameterFactory.
+
+Run in the environment in which Morepath is installed with::
+
+  $ python benchmarks/generate_create.py
+
+For each route, this times creating the model with the function made
+by :func:`morepath.traject.generate_create` and with the generic
+:class:`morepath.traject.ParameterFactory` it replaces.
+"""
+
+import timeit
+
+import morepath
+from morepath.converter import Converter, ListConverter
+from morepath.traject import ParameterFactory, generate_create
+
+NUMBER = 20000
+REPEAT = 5
+
+
+def generic_create(model_factory, parameters, converters, required, extra):
+    get_parameters = ParameterFactory(parameters, converters, required, extra)
+
+    def create(path_variables, request):
+        variables = get_parameters(request)
+        variables.update(path_variables)
+        return model_factory(**variables)
+
+    return create
+
+
+def model_factory(**kw):
+    return kw
+
+
+ROUTES = [
+    ("no parameters", {}, {}, [], False, ""),
+    (
+        "two parameters",
+        {"page": 0, "q": None},
+        {"page": Converter(int)},
+        [],
+        False,
+        "?page=3&q=morepath",
+    ),
+    (
+        "twenty parameters",
+        dict({"q%s" % i: None for i in range(20)}, page=0),
+        {"page": Converter(int), "q1": ListConverter(Converter(int))},
+        [],
+        False,
+        "?q0=a&page=3&q1=1&q1=2",
+    ),
+    (
+        "extra parameters",
+        {"page": 0},
+        {"page": Converter(int)},
+        [],
+        True,
+        "?page=3&a=1&b=2",
+    ),
+]
+
+
+def best(create, request):
+    times = timeit.repeat(
+        lambda: create({"id": "foo"}, request), number=NUMBER, repeat=REPEAT
+    )
+    return min(times) / NUMBER * 1e6
+
+
+def main():
+    app = morepath.App()
+    print("%-20s %12s %12s %8s" % ("route", "generic", "generated", "ratio"))
+    for name, parameters, converters, required, extra, query in ROUTES:
+        args = model_factory, parameters, converters, required, extra
+        generic = generic_create(*args)
+        generated = generate_create(*args)
+        request = morepath.Request.blank("/" + query, app=app)
+        assert generated({"id": "foo"}, request) == generic(
+            {"id": "foo"}, request
+        )
+        slow = best(generic, request)
+        fast = best(generated, request)
+        print(
+            "%-20s %10.2fus %10.2fus %7.2fx" % (name, slow, fast, slow / fast)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Compare the JSON encoders of Morepath with the generic encoding.
+
+Run in the environment in which Morepath is installed with::
+
+  $ python benchmarks/json_encoding.py
+
+For each payload, this times encoding it with :mod:`json` and the
+``dump_json`` function looked up by :meth:`morepath.App._dump_json` for
+each object, which is the reference, and with the
+:class:`morepath.encoder.JsonEncoderRegistry` of the app, which keeps
+the ``dump_json`` function by class, with the :mod:`json` encoder and
+with the orjson encoder if orjson is installed. It prints the time the
+reference takes per payload of 100 objects, and how many times faster
+the encoders of the registry are.
+"""
+
+import json
+import timeit
+from dataclasses import dataclass
+
+import morepath
+from morepath.encoder import orjson
+
+NUMBER = 200
+REPEAT = 5
+
+
+class App(morepath.App):
+    pass
+
+
+class JsonApp(App):
+    pass
+
+
+@JsonApp.setting(section="json", name="encoder")
+def get_json_encoder():
+    return "json"
+
+
+class OrjsonApp(App):
+    pass
+
+
+@OrjsonApp.setting(section="json", name="encoder")
+def get_orjson_encoder():
+    return "orjson"
+
+
+class Item:
+    def __init__(self, id, title):
+        self.id = id
+        self.title = title
+
+
+@App.dump_json(model=Item)
+def dump_item_json(self, request):
+    return {"id": self.id, "title": self.title}
+
+
+@App.dump_json()
+@dataclass
+class Author:
+    name: str
+    email: str
+
+
+@App.dump_json()
+@dataclass
+class Document:
+    id: int
+    title: str
+    author: Author
+    tags: list
+
+
+PAYLOADS = [
+    (
+        "plain",
+        [
+            {"id": i, "title": "Item %s" % i, "tags": ["a", "b"]}
+            for i in range(100)
+        ],
+    ),
+    ("dump_json", [Item(i, "Item %s" % i) for i in range(100)]),
+    (
+        "dataclasses",
+        [
+            Document(
+                i,
+                "Document %s" % i,
+                Author("Author", "author@example.com"),
+                ["a", "b"],
+            )
+            for i in range(100)
+        ],
+    ),
+]
+
+
+def reference_encode(app, request):
+    def default(o):
+        result = app._dump_json(o, request)
+        if result is o:
+            raise TypeError(
+                "Object of type %s is not JSON serializable"
+                % o.__class__.__name__
+            )
+        return result
+
+    def encode(content):
+        return json.dumps(
+            app._dump_json(content, request),
+            separators=(",", ":"),
+            default=default,
+        ).encode("utf-8")
+
+    return encode
+
+
+def registry_encode(app, request):
+    registry = app.config.json_encoder_registry
+
+    def encode(content):
+        return registry.encode(app, content, request)
+
+    return encode
+
+
+def best(encode, content):
+    times = timeit.repeat(lambda: encode(content), number=NUMBER, repeat=REPEAT)
+    return min(times) / NUMBER * 1e6
+
+
+def main():
+    JsonApp.commit()
+    OrjsonApp.commit()
+    json_app = JsonApp()
+    orjson_app = OrjsonApp()
+    json_request = morepath.Request.blank("/", app=json_app)
+    orjson_request = morepath.Request.blank("/", app=orjson_app)
+    encoders = [
+        ("reference", reference_encode(json_app, json_request)),
+        ("json", registry_encode(json_app, json_request)),
+    ]
+    if orjson is not None:
+        encoders.append(("orjson", registry_encode(orjson_app, orjson_request)))
+    print(
+        "%-12s" % "payload"
+        + "".join("%12s" % name for name, encode in encoders)
+    )
+    for name, content in PAYLOADS:
+        expected = json.loads(encoders[0][1](content))
+        for encoder_name, encode in encoders:
+            assert json.loads(encode(content)) == expected, encoder_name
+        reference = best(encoders[0][1], content)
+        row = "%-12s%10.1fus" % (name, reference)
+        for encoder_name, encode in encoders[1:]:
+            row += "%11.2fx" % (reference / best(encode, content))
+        print(row)
+    if orjson is None:
+        print("orjson is not installed")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,7 +17,8 @@ from dectate import commit
 from .app import App, dispatch_method
 from .authentication import NO_IDENTITY, Identity, IdentityPolicy
 from .autosetup import autoscan, scan
-from .converter import Converter
+from .cache import LRUCache
+from .converter import Converter, array_of
 from .core import excview_tween_factory as EXCVIEW
 from .core import (
     model_predicate,
@@ -31,4 +32,4 @@ from .core import request_method_predicate as LAST_VIEW_PREDICATE
 from .reify import reify
 from .request import Request, Response
 from .run import run
-from .view import redirect, render_html, render_json
+from .view import redirect, render_html, render_json, render_json_stream
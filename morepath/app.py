@@ -15,6 +15,10 @@ To actually serve requests it uses :func:`morepath.publish.publish`.
 Entirely documented in :class:`morepath.App` in the public API.
 """
 
+import gc
+import inspect
+
+from webob import BaseRequest
 from webob.exc import HTTPNotFound
 
 import dectate
@@ -22,16 +26,32 @@ import reg
 from dectate import directive
 
 from . import directive as action
+from .cache import LRUCachingKeyLookup
 from .error import LinkError
 from .path import PathInfo
 from .reify import reify
-from .request import Request
+from .request import Request, Response
+
+ROOT_MOUNT_PATH = PathInfo("", {})
+"""Path to the root app, which is not mounted anywhere."""
+
+NOT_FOUND = Response(
+    HTTPNotFound().plain_body({}), status=404, content_type="text/plain"
+)
+"""Response for requests rejected by ``routing.reject_unknown``."""
 
 
 def cached_key_lookup(key_lookup):
     return reg.DictCachingKeyLookup(key_lookup)
 
 
+def lru_cached_key_lookup(size):
+    def get_key_lookup(key_lookup):
+        return LRUCachingKeyLookup(key_lookup, size)
+
+    return get_key_lookup
+
+
 def commit_if_needed(app):
     if not app.is_committed():
         app.commit()
@@ -74,6 +94,10 @@ class App(dectate.App):
     parent = None
     """The parent in which this app was mounted."""
 
+    _mount_path = None
+
+    _defer_cache = None
+
     request_class = Request
     """The class of the Request to create. Must be a subclass of
     :class:`morepath.Request`.
@@ -106,7 +130,8 @@ class App(dectate.App):
     tween_factory = directive(action.TweenFactoryAction)
     identity_policy = directive(action.IdentityPolicyAction)
     verify_identity = directive(action.VerifyIdentityAction)
-    dump_json = directive(action.DumpJsonAction)
+    _dump_json_action = directive(action.DumpJsonAction)
+    dump_json = directive(action.DumpJsonCompositeAction)
     link_prefix = directive(action.LinkPrefixAction)
 
     def __init__(self):
@@ -130,12 +155,21 @@ class App(dectate.App):
         meth:`App.publish` get the :class:`morepath.Response`
         instance.
 
+        If the ``reject_unknown`` setting in the ``routing`` section
+        is enabled, requests for paths that no route can match are
+        answered with 404 Not Found right away, see
+        :meth:`morepath.path.PathRegistry.rejects`.
+
         :param environ: WSGI environment
         :param start_response: WSGI start_response
         :return: WSGI iterable.
         """
+        publish = self.publish
+        path_registry = self.config.path_registry
+        if path_registry.reject_unknown and path_registry.rejects(environ):
+            return NOT_FOUND(environ, start_response)
         request = self.request(environ)
-        response = self.publish(request)
+        response = publish(request)
         return response(environ, start_response)
 
     @reify
@@ -163,6 +197,58 @@ class App(dectate.App):
             self.commit()
         return self.config.tween_registry.wrap(self)
 
+    async def asgi(self, scope, receive, send):
+        """This app as an ASGI application.
+
+        See the ASGI_ spec for more information. Pass ``app.asgi`` to
+        an ASGI server to serve ``app``.
+
+        .. _ASGI: https://asgi.readthedocs.io/
+
+        Uses :meth:`App.request` to generate a :class:`morepath.Request`
+        instance, then uses :meth:`App.publish_async` to get the
+        :class:`morepath.Response` instance. Model factories, views and
+        tweens defined with ``async def`` are awaited. Views that are
+        not async are called in :attr:`App.thread_pool`. See
+        :mod:`morepath.asgi` for more information.
+
+        :param scope: the ASGI connection scope.
+        :param receive: awaitable callable to receive event messages.
+        :param send: awaitable callable to send event messages.
+        """
+        # to avoid circular import import serve here
+        from .asgi import serve
+
+        await serve(self, scope, receive, send)
+
+    @reify
+    def publish_async(self):
+        """Publish functionality for ASGI wrapped in tweens.
+
+        Like :meth:`App.publish`, but wraps
+        :func:`morepath.asgi.publish_async` using
+        :func:`morepath.asgi.wrap`.
+
+        :return: a function defined with ``async def`` that takes a
+          :class:`morepath.Request` instance and returns a
+          :class:`morepath.Response` instance.
+        """
+        from .asgi import wrap
+
+        if not self.is_committed():
+            self.commit()
+        return wrap(self)
+
+    @reify
+    def thread_pool(self):
+        """The thread pool in which :meth:`App.asgi` calls sync views.
+
+        See :func:`morepath.asgi.thread_pool`.
+        """
+        from .asgi import thread_pool
+
+        return thread_pool(self)
+
     def ancestors(self):
         """Return iterable of all ancestors of this app.
 
@@ -199,16 +285,43 @@ class App(dectate.App):
             if app.__class__ not in self.config.path_registry.mounted:
                 return None
         else:
-            if isinstance(app, str):
-                factory = self.config.path_registry.named_mounted.get(app)
-            else:
-                factory = self.config.path_registry.mounted.get(app)
+            factory = self._mount_factory(app)
             if factory is None:
                 return None
+            cached = self.config.path_registry.cached_factories.get(factory)
+            if cached is not None:
+                return cached.get(self, variables)
             result = factory(**variables)
         result.parent = self
         return result
 
+    def evict_child(self, app, **variables):
+        """Remove a cached mounted app instance.
+
+        If an app is mounted with a ``cache`` in the
+        :meth:`morepath.App.mount` directive, its instances are kept
+        in that cache. This removes the instance that :meth:`App.child`
+        would return for the same arguments, so that the next request
+        creates a new one.
+
+        :param app: the app class or the name under which it was mounted.
+        :param variables: the parameters that go to its ``mount`` function.
+        """
+        factory = self._mount_factory(app)
+        cached = self.config.path_registry.cached_factories.get(factory)
+        if cached is not None:
+            cached.invalidate(self, variables)
+
+    def _mount_factory(self, app):
+        """Get the function that mounts an app in this app.
+
+        :param app: the app class or the name under which it was mounted.
+        :return: the function, or ``None`` if the app isn't mounted here.
+        """
+        if isinstance(app, str):
+            return self.config.path_registry.named_mounted.get(app)
+        return self.config.path_registry.mounted.get(app)
+
     def sibling(self, app, **variables):
         """Get app mounted next to this app.
 
@@ -288,6 +401,129 @@ class App(dectate.App):
         for section, section_settings in settings.items():
             set_setting_section(section, section_settings)
 
+    @classmethod
+    def dispatch_cache_stats(cls):
+        """Statistics about the caches of the dispatch methods.
+
+        The lookups of dispatch methods such as
+        :meth:`morepath.App.get_view` are cached. By default the cache
+        is unbounded. If the ``cache_size`` setting in the ``dispatch``
+        section is set, each dispatch method of the app class caches at
+        most that amount of lookups in a :class:`morepath.LRUCache`.
+
+        :return: a dict with the name of each dispatch method as key and
+          the statistics of its cache, see :meth:`morepath.LRUCache.stats`,
+          as value. Empty if the caches are unbounded.
+        """
+        result = {}
+        for name, call in cls._dispatch_methods():
+            key_lookup = call.key_lookup
+            if isinstance(key_lookup, LRUCachingKeyLookup):
+                result[name] = key_lookup.cache.stats()
+        return result
+
+    @classmethod
+    def view_cache_stats(cls):
+        """Statistics about the cache of views looked up by predicates.
+
+        :meth:`morepath.Request.view` looks up views by predicates.
+        These lookups are cached in a :class:`morepath.LRUCache` for
+        each app class, which is cleared when the app is committed.
+
+        :return: the statistics of the cache, see
+          :meth:`morepath.LRUCache.stats`.
+        """
+        return cls.config.view_registry.cache.stats()
+
+    def warmup(self, urls=(), freeze=True):
+        """Prepare the app to handle requests.
+
+        Normally the app is committed, its tweens are wrapped and the
+        lookup caches are filled while the first requests are handled.
+        If a server forks worker processes, such as gunicorn with
+        ``preload_app``, each worker would do this again, and the
+        caches would not be shared between the workers. Call this in
+        the parent process before the workers are forked instead.
+
+        This commits the app and the apps mounted under it, wraps the
+        tweens and fills the caches of the dispatch methods with the
+        registered views, paths, permission rules and ``dump_json``
+        functions, as well as the ``dump_json`` functions used to
+        encode JSON.
+
+        :param urls: paths of requests to handle, so that their
+          routes and mounted apps are cached too. The responses are
+          discarded. Optional.
+        :param freeze: if ``True``, finish by moving all objects into
+          the permanent generation of the garbage collector with
+          :func:`gc.freeze`, so that the workers don't touch their memory
+          during garbage collection and it stays shared.
+        """
+        # this commits the app if needed
+        self.publish
+        for app_class in self.mounted_app_classes():
+            class_paths = app_class._class_path.key_lookup.key_lookup
+            models = [model for (model,) in class_paths.known_keys]
+            app_class._warmup_dispatch_methods(models)
+            app_class.config.view_registry.warmup(models)
+            app_class.config.json_encoder_registry.warmup(models)
+        for url in urls:
+            BaseRequest.blank(url).get_response(self)
+        if freeze:
+            gc.freeze()
+
+    @classmethod
+    def _warmup_dispatch_methods(cls, models):
+        """Fill the caches of the dispatch methods.
+
+        Looks up the registered keys of each dispatch method. Dispatch
+        methods that dispatch on a single class, such as the ones used
+        for link generation, are also looked up for ``models``.
+
+        :param models: model classes that have a path.
+        """
+        for name, call in cls._dispatch_methods():
+            key_lookup = call.key_lookup
+            registry = key_lookup.key_lookup
+            keys = set(registry.known_keys)
+            if len(registry.indexes) == 1 and isinstance(
+                registry.indexes[0], reg.ClassIndex
+            ):
+                keys.update((model,) for model in models)
+            for key in keys:
+                if key_lookup.component(key) is None:
+                    key_lookup.fallback(key)
+
+    @classmethod
+    def _dispatch_methods(cls):
+        for name in dir(cls):
+            if name == "__annotations__":
+                continue
+            attr = getattr(cls, name)
+            if inspect.isfunction(attr) and hasattr(attr, "add_predicates"):
+                yield name, attr
+
+    @classmethod
+    def _set_dispatch_cache_size(cls, size):
+        """Set the size of the caches of the dispatch methods.
+
+        This is called during configuration, before anything is
+        registered on the dispatch methods, as that resets them.
+
+        :param size: the maximum amount of cached lookups for each
+          dispatch method, or ``None`` or 0 for an unbounded cache.
+        """
+        if size:
+            get_key_lookup = lru_cached_key_lookup(size)
+        else:
+            get_key_lookup = cached_key_lookup
+        for name, call in cls._dispatch_methods():
+            dispatch = call.add_predicates.__self__
+            if dispatch.get_key_lookup is get_key_lookup:
+                continue
+            dispatch.get_key_lookup = get_key_lookup
+            call.add_predicates([])
+
     @dispatch_method()
     def get_view(self, obj, request):
         """Get the view that represents the obj in the context of a request.
@@ -459,6 +695,39 @@ class App(dectate.App):
         """
         return self._class_path(obj.__class__, self._path_variables(obj))
 
+    def _get_mount_path(self):
+        """Path to this app itself including mounted path.
+
+        The result is cached on the app instance, as it is the same
+        for all links made in this app. It is computed again if the
+        ``parent`` of this app or of any of its ancestors changes.
+
+        :return: a :class:`morepath.path.PathInfo` with the path to
+          this app, not yet stripped of slashes, or ``None`` if this
+          app cannot be reached from the root app.
+        """
+        parent = self.parent
+        if parent is None:
+            return ROOT_MOUNT_PATH
+        parent_info = parent._get_mount_path()
+        cached = self._mount_path
+        if (
+            cached is not None
+            and cached[0] is parent
+            and cached[1] is parent_info
+        ):
+            return cached[2]
+        if parent_info is None:
+            info = None
+        else:
+            info = parent._get_path(self)
+        if info is not None and parent_info is not ROOT_MOUNT_PATH:
+            parameters = info.parameters.copy()
+            parameters.update(parent_info.parameters)
+            info = PathInfo(parent_info.path + "/" + info.path, parameters)
+        self._mount_path = (parent, parent_info, info)
+        return info
+
     def _get_mounted_path(self, obj):
         """Path for model obj including mounted path.
 
@@ -468,19 +737,66 @@ class App(dectate.App):
         :return: a :class:`morepath.path.PathInfo` with fully resolved
           path in mounts.
         """
-        paths = []
-        parameters = {}
-        app = self
-        while app is not None:
-            info = app._get_path(obj)
-            if info is None:
-                return None
-            paths.append(info.path)
-            parameters.update(info.parameters)
-            obj = app
-            app = app.parent
-        paths.reverse()
-        return PathInfo("/".join(paths).strip("/"), parameters)
+        info = self._get_path(obj)
+        if info is None:
+            return None
+        if self.parent is None:
+            return PathInfo(info.path.strip("/"), info.parameters)
+        mount_info = self._get_mount_path()
+        if mount_info is None:
+            return None
+        parameters = info.parameters.copy()
+        parameters.update(mount_info.parameters)
+        return PathInfo(
+            (mount_info.path + "/" + info.path).strip("/"), parameters
+        )
+
+    def _get_mounted_path_getter(self, model):
+        """Function to get the path for instances of model class.
+
+        Like :meth:`morepath.App._get_mounted_path`, but the path
+        registered for ``model`` is looked up once. Used to create
+        many links at once.
+
+        :param model: model class
+        :return: a function that takes a model object and returns a
+          :class:`morepath.path.PathInfo` with fully resolved path in
+          mounts, or ``None`` if this app has no path for instances of
+          ``model``.
+        """
+        get_path = self._class_path.by_predicates(model=model).component
+        if get_path is None:
+            return None
+        get_variables = (
+            self._path_variables.by_predicates(obj=model).component
+            or self._default_path_variables.by_predicates(obj=model).component
+        )
+        if get_variables is None:
+            return None
+        if self.parent is None:
+
+            def get_mounted_path(obj):
+                info = get_path(self, model, get_variables(self, obj))
+                return PathInfo(info.path.strip("/"), info.parameters)
+
+            return get_mounted_path
+
+        mount_info = self._get_mount_path()
+        if mount_info is None:
+            return None
+        mount_path = mount_info.path + "/"
+        mount_parameters = mount_info.parameters
+
+        def get_mounted_path(obj):
+            info = get_path(self, model, get_variables(self, obj))
+            path = (mount_path + info.path).strip("/")
+            if not mount_parameters:
+                return PathInfo(path, info.parameters)
+            parameters = info.parameters.copy()
+            parameters.update(mount_parameters)
+            return PathInfo(path, parameters)
+
+        return get_mounted_path
 
     def _get_mounted_class_path(self, model, variables):
         """Path for model class and variables including mounted path.
@@ -497,8 +813,10 @@ class App(dectate.App):
             return None
         if self.parent is None:
             return info
-        mount_info = self.parent._get_mounted_path(self)
-        path = mount_info.path
+        mount_info = self._get_mount_path()
+        if mount_info is None:
+            return None
+        path = mount_info.path.strip("/")
         if info.path:
             path += "/" + info.path
         parameters = info.parameters.copy()
@@ -557,16 +875,7 @@ class App(dectate.App):
             if result is not None:
                 return result, app
             seen.add(app)
-            next_app = app._deferred_link_app(obj)
-            if next_app is None:
-                # only if we can establish the variables of the app here
-                # fall back on using class link app
-                variables = app._path_variables(obj)
-                if variables is not None:
-                    next_app = app._deferred_class_link_app(
-                        obj.__class__, variables
-                    )
-            app = next_app
+            app = app._deferred_app(obj)
         return None, app
 
     def _follow_class_defers(self, find, model, variables):
@@ -594,5 +903,83 @@ class App(dectate.App):
             if result is not None:
                 return result, app
             seen.add(app)
-            app = app._deferred_class_link_app(model, variables)
+            app = app._deferred_class_app(model, variables)
         return None, app
+
+    def _deferred_app(self, obj):
+        """Get app to defer link generation for obj to.
+
+        Uses the function registered with
+        :meth:`morepath.App.defer_links` for the class of ``obj``, and
+        falls back on the one registered with
+        :meth:`morepath.App.defer_class_links`. If these were
+        registered with ``per_class``, the app is cached on this app
+        instance by the class of ``obj``.
+
+        :param obj: model object to link to.
+        :return: instance of :class:`morepath.App` subclass to defer
+          to, or ``None``.
+        """
+        model = obj.__class__
+        cache = self._defer_cache
+        key = ("defer_links", model)
+        if cache is not None and key in cache:
+            return cache[key]
+        per_class = self.config.path_registry.per_class_defers
+        cacheable = True
+        result = None
+        defer = self._deferred_link_app.by_predicates(obj=model).component
+        if defer is not None:
+            result = defer(self, obj)
+            cacheable = defer in per_class
+        if result is None:
+            defer = self._deferred_class_link_app.by_predicates(
+                model=model
+            ).component
+            if defer is not None:
+                # only if we can establish the variables of the app here
+                # fall back on using class link app
+                variables = self._path_variables(obj)
+                if variables is not None:
+                    result = defer(self, model, variables)
+                cacheable = (
+                    cacheable and variables is not None and defer in per_class
+                )
+        if cacheable:
+            self._store_deferred_app(key, result)
+        return result
+
+    def _deferred_class_app(self, model, variables):
+        """Get app to defer class link generation for model to.
+
+        Uses the function registered with
+        :meth:`morepath.App.defer_class_links` for ``model``. If it
+        was registered with ``per_class``, the app is cached on this
+        app instance by ``model``.
+
+        :param model: model class to link to.
+        :param variables: dict of variables used to construct class link.
+        :return: instance of :class:`morepath.App` subclass to defer
+          to, or ``None``.
+        """
+        cache = self._defer_cache
+        key = ("defer_class_links", model)
+        if cache is not None and key in cache:
+            return cache[key]
+        defer = self._deferred_class_link_app.by_predicates(
+            model=model
+        ).component
+        if defer is None:
+            result = None
+        else:
+            result = defer(self, model, variables)
+            if defer not in self.config.path_registry.per_class_defers:
+                return result
+        self._store_deferred_app(key, result)
+        return result
+
+    def _store_deferred_app(self, key, app):
+        cache = self._defer_cache
+        if cache is None:
+            cache = self._defer_cache = {}
+        cache[key] = app
@@ -0,0 +1,379 @@
+"""Serve a Morepath application with ASGI.
+
+:meth:`morepath.App.asgi` is an ASGI application. It turns the ASGI
+connection scope into a WSGI environment and a
+:class:`morepath.Request`, publishes the request with
+:func:`publish_async` wrapped in tweens, and sends the resulting
+:class:`morepath.Response`.
+
+Model factories and view functions may be defined with ``async
+def``. Routing, view predicates and link generation work as they do
+with WSGI. Model factories that are not async are called in the event
+loop, so they should not wait for I/O. View functions that are not
+async are called in a bounded thread pool, see :func:`thread_pool`.
+
+A tween factory may return a tween defined with ``async def``, which
+awaits the handler it wraps. To find out whether it should, a tween
+factory can check the handler with :func:`is_async`. Tweens that are not
+async are called in a thread, in which calling the handler waits for
+the result in the event loop. Consecutive tweens that are not async are
+called in the same thread, so that a request only waits for one thread
+at a time for them.
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from webob.exc import HTTPNotFound
+
+from .app import NOT_FOUND, App
+from .publish import get_view_name
+from .view import View
+
+EXECUTOR_KEY = "morepath.executor"
+"""The key of the thread pool for views in the WSGI environment."""
+
+_local = threading.local()
+
+
+def is_async(func):
+    """Check whether a function returns an awaitable.
+
+    :param func: a function, such as the handler passed to a tween
+      factory.
+    :return: ``True`` for functions defined with ``async def`` and for
+      the handlers that :meth:`morepath.App.asgi` passes to tween
+      factories.
+    """
+    return isinstance(func, AsyncHandler) or inspect.iscoroutinefunction(func)
+
+
+class AsyncHandler:
+    """The handler passed to a tween factory for ASGI.
+
+    Called in the event loop it returns an awaitable. Called by a tween
+    that is not async, in the thread in which that tween runs, it waits
+    for the response to be created in the event loop and returns it.
+
+    :param func: a function defined with ``async def`` that takes a
+      :class:`morepath.Request` and returns a response.
+    """
+
+    def __init__(self, func):
+        self.func = func
+
+    def __call__(self, request):
+        loop = getattr(_local, "loop", None)
+        if loop is None:
+            return self.func(request)
+        return asyncio.run_coroutine_threadsafe(
+            self.func(request), loop
+        ).result()
+
+
+def sync_tween(tween):
+    """Make a tween that is not async usable for ASGI.
+
+    :param tween: a function that takes a :class:`morepath.Request`
+      and returns a response.
+    :return: a function defined with ``async def`` that calls ``tween``
+      in a thread of the default executor of the event loop.
+    """
+
+    def call(loop, request):
+        _local.loop = loop
+        try:
+            return tween(request)
+        finally:
+            _local.loop = None
+
+    async def async_tween(request):
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            None, functools.partial(context.run, call, loop, request)
+        )
+
+    return async_tween
+
+
+def wrap(app):
+    """Wrap :func:`publish_async` with the tweens of an app.
+
+    Like :meth:`morepath.tween.TweenRegistry.wrap`, but the handler
+    passed to each tween factory is an :class:`AsyncHandler`, unless
+    the tween it wraps is not async either. Such a tween is then called
+    directly, in the thread of the tween that wraps it; the thread of
+    a tween that is not async waits for the inner tweens, so calling
+    them in threads of their own could use up the executor and hang.
+
+    :param app: an instance of :class:`morepath.App`.
+    :return: a function defined with ``async def`` that takes a
+      :class:`morepath.Request` and returns a response.
+    """
+    result = publish_async
+    sync = None
+    tween_registry = app.config.tween_registry
+    for tween_factory in reversed(tween_registry.sorted_tween_factories()):
+        if sync is None:
+            tween = tween_factory(app, AsyncHandler(result))
+        else:
+            tween = tween_factory(app, sync)
+        if is_async(tween):
+            result = tween
+            sync = None
+        else:
+            result = sync_tween(tween)
+            sync = tween
+    return result
+
+
+def thread_pool(app):
+    """Create the thread pool in which views that are not async are called.
+
+    Its size is taken from the optional ``thread_pool_size`` setting
+    in the ``asgi`` section. By default the size is that of a
+    :class:`concurrent.futures.ThreadPoolExecutor`.
+
+    :param app: an instance of :class:`morepath.App`.
+    :return: a :class:`concurrent.futures.ThreadPoolExecutor`.
+    """
+    section = getattr(app.settings, "asgi", None)
+    return ThreadPoolExecutor(
+        getattr(section, "thread_pool_size", None),
+        thread_name_prefix="morepath",
+    )
+
+
+async def run_in_thread_pool(request, func, *args):
+    """Call a function in the thread pool for views.
+
+    :param request: the :class:`morepath.Request` being published.
+    :param func: the function to call.
+    :param args: the arguments of the function.
+    :return: the return value of the function.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        request.environ.get(EXECUTOR_KEY),
+        functools.partial(context.run, func, *args),
+    )
+
+
+async def publish_async(request):
+    """Handle request and return response.
+
+    Like :func:`morepath.publish.publish`, but model factories and
+    views defined with ``async def`` are awaited.
+
+    :param request: :class:`morepath.Request` instance.
+    :return: :class:`morepath.Response` instance.
+    """
+    obj = await resolve_model_async(request)
+    return await resolve_response_async(obj, request)
+
+
+async def resolve_model_async(request):
+    """Resolve request to a model object.
+
+    Like :func:`morepath.publish.resolve_model`, but the model
+    instances returned by model factories defined with ``async def``
+    are awaited.
+
+    :param request: :class:`morepath.Request` instance.
+    :return: model object or ``None`` if not found.
+    """
+    app = request.app
+    while request.unconsumed:
+        next = app.config.path_registry.consume(request)
+        if inspect.isawaitable(next):
+            next = await next
+        if next is None:
+            return next
+        if not isinstance(next, App):
+            return next
+        app = request.app
+        next.parent = app
+        request.app = next
+        app = next
+    result = app.config.path_registry.consume(request)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+async def resolve_response_async(obj, request):
+    """Given model object and request, create response.
+
+    Like :func:`morepath.publish.resolve_response`, but the view is
+    rendered with :meth:`morepath.view.View.call_async`.
+
+    :param obj: model object to get response for.
+    :param request: :class:`morepath.Request` instance.
+    :return: :class:`morepath.Response` instance
+    """
+    view_name = request.view_name = get_view_name(request.unconsumed)
+    if view_name is None:
+        raise HTTPNotFound()
+    app = request.app
+    view = app.config.view_registry.find_view(app, obj, request)
+    if isinstance(view, View):
+        return await view.call_async(app, obj, request)
+    return view(app, obj, request)
+
+
+async def serve(app, scope, receive, send):
+    """Handle an ASGI connection.
+
+    See :meth:`morepath.App.asgi`.
+
+    :param app: the :class:`morepath.App` instance.
+    :param scope: the ASGI connection scope.
+    :param receive: awaitable callable to receive ASGI event messages.
+    :param send: awaitable callable to send ASGI event messages.
+    """
+    if scope["type"] == "lifespan":
+        return await serve_lifespan(app, receive, send)
+    if scope["type"] != "http":
+        raise ValueError("Unsupported ASGI scope type: %s" % scope["type"])
+    body = []
+    more_body = True
+    while more_body:
+        message = await receive()
+        body.append(message.get("body", b""))
+        more_body = message.get("more_body", False)
+    environ = scope_environ(scope, b"".join(body))
+    publish = app.publish_async
+    environ[EXECUTOR_KEY] = app.thread_pool
+    path_registry = app.config.path_registry
+    if path_registry.reject_unknown and path_registry.rejects(environ):
+        response = NOT_FOUND
+    else:
+        response = await publish(app.request(environ))
+    await send_response(response, environ, send)
+
+
+async def serve_lifespan(app, receive, send):
+    """Handle the ASGI lifespan protocol.
+
+    The app is committed and its tweens are wrapped on startup, and
+    the thread pool for views is shut down on shutdown.
+    """
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            app.publish_async
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            pool = app.__dict__.get("thread_pool")
+            if pool is not None:
+                pool.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+def scope_environ(scope, body):
+    """Create a WSGI environment for an ASGI HTTP connection scope.
+
+    :param scope: the ASGI connection scope.
+    :param body: the request body as bytes.
+    :return: the WSGI environment dict.
+    """
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "")
+        .encode("utf-8")
+        .decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": "HTTP/%s" % scope.get("http_version", "1.1"),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": BytesIO(body),
+        "wsgi.errors": BytesIO(),
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    client = scope.get("client")
+    if client:
+        environ["REMOTE_ADDR"] = client[0]
+    for name, value in scope.get("headers", ()):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_TYPE" or name == "CONTENT_LENGTH":
+            key = name
+        else:
+            key = "HTTP_" + name
+        if key in environ:
+            value = environ[key] + "," + value
+        environ[key] = value
+    if "CONTENT_LENGTH" not in environ and body:
+        environ["CONTENT_LENGTH"] = str(len(body))
+    return environ
+
+
+async def send_response(response, environ, send):
+    """Send a response as ASGI event messages.
+
+    The response is called as a WSGI application, so that ``HEAD``
+    requests and conditional responses are handled as with WSGI. The
+    body is sent in the chunks of its ``app_iter``; these are taken in
+    the thread pool for views unless the ``app_iter`` is a list or a
+    tuple.
+
+    :param response: a :class:`webob.response.Response`.
+    :param environ: the WSGI environment of the request.
+    :param send: awaitable callable to send ASGI event messages.
+    """
+    started = []
+
+    def start_response(status, headerlist, exc_info=None):
+        started.append((status, headerlist))
+
+    app_iter = response(environ, start_response)
+    ((status, headerlist),) = started
+    await send(
+        {
+            "type": "http.response.start",
+            "status": int(status.split(" ", 1)[0]),
+            "headers": [
+                (name.lower().encode("latin-1"), value.encode("latin-1"))
+                for name, value in headerlist
+            ],
+        }
+    )
+    try:
+        if isinstance(app_iter, (list, tuple)):
+            await send(
+                {"type": "http.response.body", "body": b"".join(app_iter)}
+            )
+            return
+        loop = asyncio.get_running_loop()
+        executor = environ.get(EXECUTOR_KEY)
+        chunks = iter(app_iter)
+        while True:
+            chunk = await loop.run_in_executor(executor, next, chunks, None)
+            if chunk is None:
+                break
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": True,
+                }
+            )
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        close = getattr(app_iter, "close", None)
+        if close is not None:
+            close()
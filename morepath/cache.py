@@ -0,0 +1,171 @@
+"""Bounded caches that keep statistics.
+
+:class:`LRUCache` is used to cache route resolution in
+:class:`morepath.traject.TrajectRegistry`. :class:`LRUCachingKeyLookup`
+uses it to cache the lookups of dispatch methods. :func:`create_cache`
+creates the caches kept by model class.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+
+
+class LRUCache:
+    """A cache that holds at most ``size`` items.
+
+    When the cache is full the least recently used item is evicted.
+    The cache counts hits, misses and evictions, see
+    :meth:`LRUCache.stats`. It is safe to use from multiple threads.
+
+    :param size: the maximum amount of items in the cache.
+    """
+
+    def __init__(self, size):
+        if size < 1:
+            raise ValueError("Cache size must be at least 1: %r" % size)
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Get item from the cache.
+
+        :param key: the key of the item.
+        :param default: returned if the item is not in the cache.
+        :return: the cached item, or ``default``.
+        """
+        with self._lock:
+            try:
+                value = self._items[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Put item into the cache.
+
+        Evicts the least recently used item if the cache is full.
+
+        :param key: the key of the item.
+        :param value: the item to cache.
+        """
+        with self._lock:
+            items = self._items
+            items[key] = value
+            items.move_to_end(key)
+            if len(items) > self.size:
+                items.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """Remove item from the cache, if it is there.
+
+        :param key: the key of the item.
+        """
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        """Remove all items from the cache.
+
+        The statistics are kept.
+        """
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def stats(self):
+        """Statistics about the use of the cache.
+
+        :return: a dict with ``size``, ``maxsize``, ``hits``, ``misses``
+          and ``evictions`` keys.
+        """
+        return {
+            "size": len(self._items),
+            "maxsize": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class DictCache(dict):
+    """An unbounded cache.
+
+    A dict with the ``get`` and ``put`` methods of :class:`LRUCache`.
+    """
+
+    put = dict.__setitem__
+
+
+def create_cache(size):
+    """Create a cache that is bounded if a size is given.
+
+    This is used for the caches by model class, which are bounded by
+    the ``cache_size`` setting in the ``dispatch`` section like the
+    caches of the dispatch methods.
+
+    :param size: the maximum amount of items, or ``None`` or 0 for an
+      unbounded cache.
+    :return: a :class:`LRUCache` or a :class:`DictCache`.
+    """
+    if size:
+        return LRUCache(size)
+    return DictCache()
+
+
+FALLBACK = object()
+ALL = object()
+MISSING = object()
+
+
+class LRUCachingKeyLookup:
+    """A Reg key lookup that caches in a :class:`LRUCache`.
+
+    Implements the read-only API of :class:`reg.PredicateRegistry`
+    like :class:`reg.DictCachingKeyLookup`, but the amount of cached
+    lookups is bounded. This is used for the dispatch methods of an
+    app class if the ``cache_size`` setting in the ``dispatch`` section
+    is set.
+
+    :param key_lookup: the :class:`reg.PredicateRegistry` to cache.
+    :param size: the maximum amount of cached lookups.
+    """
+
+    def __init__(self, key_lookup, size):
+        self.key_lookup = key_lookup
+        self.cache = LRUCache(size)
+
+    def component(self, key):
+        result = self.cache.get(key, MISSING)
+        if result is MISSING:
+            result = self.key_lookup.component(key)
+            self.cache.put(key, result)
+        return result
+
+    def fallback(self, key):
+        cache_key = FALLBACK, key
+        result = self.cache.get(cache_key, MISSING)
+        if result is MISSING:
+            result = self.key_lookup.fallback(key)
+            self.cache.put(cache_key, result)
+        return result
+
+    def all(self, key):
+        cache_key = ALL, key
+        result = self.cache.get(cache_key, MISSING)
+        if result is MISSING:
+            result = list(self.key_lookup.all(key))
+            self.cache.put(cache_key, result)
+        return result
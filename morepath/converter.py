@@ -7,11 +7,14 @@ passed into model factories that are configured using the
 directives. The inverse conversion back from Python value to string
 also needs to be provided to support link generation.
 
-:class:`morepath.Converter` is exported to the public API.
+:class:`morepath.Converter` and :func:`morepath.array_of` are exported
+to the public API.
 
 See also :class:`morepath.directive.ConverterRegistry`
 """
 
+from array import array
+
 import reg
 from dectate import DirectiveError
 
@@ -127,6 +130,105 @@ class ListConverter:
         return not self == other
 
 
+class ArrayConverter(ListConverter):
+    """How to decode from list of strings to an array and back.
+
+    Like :class:`ListConverter`, but the values are decoded into an
+    :class:`array.array`, or into a NumPy array. This takes a lot less
+    memory than a list for many numbers. Created with
+    :func:`morepath.array_of`.
+
+    Used for decoding/encoding URL parameters.
+    """
+
+    def __init__(self, converter, typecode, numpy=False):
+        """Create new converter.
+
+        :param converter: the converter to use for array entries, or
+          a type for which the converter is looked up.
+        :param typecode: the :mod:`array` typecode of the array.
+        :param numpy: if true, decode into a NumPy array with the
+          ``dtype`` given by ``typecode``.
+        """
+        super().__init__(converter)
+        self.typecode = typecode
+        self.numpy = numpy
+        if numpy:
+            from numpy import fromiter
+
+            self._fromiter = fromiter
+
+    def decode(self, strings):
+        """Decode list of strings into an array.
+
+        :param strings: list of strings
+        :return: :class:`array.array` or NumPy array of values.
+        """
+        values = map(self.converter.single_decode, strings)
+        try:
+            if self.numpy:
+                return self._fromiter(
+                    values, dtype=self.typecode, count=len(strings)
+                )
+            return array(self.typecode, values)
+        except OverflowError:
+            raise ValueError
+
+    def with_converter(self, converter):
+        """Get this converter with another converter for entries.
+
+        :param converter: the converter to use for array entries.
+        :return: a :class:`ArrayConverter` instance.
+        """
+        if converter is self.converter:
+            return self
+        return ArrayConverter(converter, self.typecode, self.numpy)
+
+    def __eq__(self, other):
+        if not isinstance(other, ArrayConverter):
+            return False
+        return (
+            self.converter == other.converter
+            and self.typecode == other.typecode
+            and self.numpy == other.numpy
+        )
+
+
+TYPECODES = {int: "q", float: "d"}
+"""Default :mod:`array` typecodes for :func:`array_of`."""
+
+
+def array_of(type, typecode=None, numpy=False):
+    """Converter for repeated URL parameters decoded into an array.
+
+    Use it in the ``converters`` argument of the
+    :meth:`morepath.App.path` directive, like ``[int]``, to get the
+    values of a URL parameter that is repeated many times, such as
+    ``?id=1&id=2``, as an :class:`array.array` instead of a list::
+
+      @App.path(model=Items, path='items',
+                converters={'id': morepath.array_of(int)})
+      def get_items(id):
+          ...
+
+    An array is encoded into repeated URL parameters again when
+    creating a link.
+
+    :param type: the type of the entries, such as ``int`` or
+      ``float``. The converter registered for it decodes the entries.
+    :param typecode: the :mod:`array` typecode of the array. By
+      default this is ``q`` for ``int`` and ``d`` for ``float``.
+    :param numpy: if true, decode into a NumPy array instead. NumPy
+      must be installed.
+    :return: a :class:`morepath.converter.ArrayConverter` instance.
+    """
+    if typecode is None:
+        typecode = TYPECODES.get(type)
+        if typecode is None:
+            raise DirectiveError("Cannot find array typecode for: %r" % type)
+    return ArrayConverter(type, typecode, numpy)
+
+
 IDENTITY_CONVERTER = Converter(lambda s: s, lambda s: s)
 """Converter that has no effect.
 
@@ -175,6 +277,8 @@ class ConverterRegistry:
           converter; else, assume it is a converter and return it.
         :return: a :class:`morepath.Converter` instance.
         """
+        if isinstance(spec, ArrayConverter):
+            return spec.with_converter(self.actual_converter(spec.converter))
         if isinstance(spec, list):
             if len(spec) == 0:
                 spec = IDENTITY_CONVERTER
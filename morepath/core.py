@@ -22,11 +22,11 @@ your code with future version of Morepath if you do that, though.
 
 import re
 from datetime import date, datetime
-from time import mktime, strptime
 
 from webob.exc import (
     HTTPBadRequest,
     HTTPException,
+    HTTPForbidden,
     HTTPMethodNotAllowed,
     HTTPNotFound,
     HTTPOk,
@@ -36,7 +36,10 @@ from webob.exc import (
 from reg import ClassIndex, KeyIndex
 
 from .app import App
+from .asgi import is_async
+from .cache import LRUCache
 from .converter import IDENTITY_CONVERTER, Converter
+from .request import Response
 
 
 @App.predicate(App.get_view, name="model", default=None, index=ClassIndex)
@@ -114,7 +117,11 @@ def unicode_converter():
 
 
 def date_decode(s):
-    return date.fromtimestamp(mktime(strptime(s, "%Y%m%d")))
+    # the format is fixed as %Y%m%d, so we slice instead of using
+    # strptime, which is slow and depends on the locale
+    if len(s) != 8 or not (s.isascii() and s.isdigit()):
+        raise ValueError("Cannot decode date: %r" % s)
+    return date(int(s[:4]), int(s[4:6]), int(s[6:]))
 
 
 def date_encode(d):
@@ -128,7 +135,21 @@ def date_converter():
 
 
 def datetime_decode(s):
-    return datetime.fromtimestamp(mktime(strptime(s, "%Y%m%dT%H%M%S")))
+    # the format is fixed as %Y%m%dT%H%M%S
+    if (
+        len(s) != 15
+        or s[8] != "T"
+        or not (s.isascii() and s[:8].isdigit() and s[9:].isdigit())
+    ):
+        raise ValueError("Cannot decode datetime: %r" % s)
+    return datetime(
+        int(s[:4]),
+        int(s[4:6]),
+        int(s[6:8]),
+        int(s[9:11]),
+        int(s[11:13]),
+        int(s[13:]),
+    )
 
 
 def datetime_encode(d):
@@ -150,27 +171,47 @@ def excview_tween_factory(app, handler):
 
     If no view can be found, raise it all the way up -- this will be a
     500 internal server error and an exception logged.
+
+    For :meth:`morepath.App.asgi` this makes an async tween, which
+    awaits exception views defined with ``async def``.
     """
 
+    def exception_view(request, exc):
+        # we must look up by predicates here because we
+        # do not want the request to feature in the lookup;
+        # we don't want its request method or name to influence
+        # exception lookup. The view registry caches the view
+        # found for the exception class.
+        view = request.app.config.view_registry.by_predicates(
+            {"model": exc.__class__}
+        )
+        if view is None:
+            raise
+
+        # we don't want to run any after already set in the exception view
+        if not isinstance(exc, (HTTPOk, HTTPRedirection)):
+            request.clear_after()
+        return view
+
+    if is_async(handler):
+
+        async def async_excview_tween(request):
+            try:
+                response = await handler(request)
+            except Exception as exc:
+                view = exception_view(request, exc)
+                if view.is_async:
+                    return await view.call_async(app, exc, request)
+                return view(app, exc, request)
+            return response
+
+        return async_excview_tween
+
     def excview_tween(request):
         try:
             response = handler(request)
         except Exception as exc:
-            # we must use component_by_keys here because we
-            # do not want the request to feature in the lookup;
-            # we don't want its request method or name to influence
-            # exception lookup
-            view = request.app.get_view.by_predicates(
-                model=exc.__class__
-            ).component
-            if view is None:
-                raise
-
-            # we don't want to run any after already set in the exception view
-            if not isinstance(exc, (HTTPOk, HTTPRedirection)):
-                request.clear_after()
-
-            return view(app, exc, request)
+            return exception_view(request, exc)(app, exc, request)
         return response
 
     return excview_tween
@@ -200,6 +241,16 @@ def poisoned_host_header_protection_tween_factory(app, handler):
 
         return handler(request)
 
+    if is_async(handler):
+
+        async def async_poisoned_host_header_protection_tween(request):
+            if not valid_host_re.match(request.host.lower()):
+                return HTTPBadRequest("Invalid HOST header")
+
+            return await handler(request)
+
+        return async_poisoned_host_header_protection_tween
+
     return poisoned_host_header_protection_tween
 
 
@@ -210,4 +261,64 @@ def standard_exception_view(self, request):
     Applies to subclasses of :class:`webob.HTTPException`.
     """
     # webob HTTPException is a response already
-    return self
+    return prebuilt_response(self, request)
+
+
+PREBUILT_EXCEPTIONS = (
+    HTTPBadRequest,
+    HTTPForbidden,
+    HTTPNotFound,
+    HTTPMethodNotAllowed,
+)
+"""The :mod:`webob.exc` classes for which responses are prebuilt."""
+
+prebuilt_responses = LRUCache(1000)
+"""The responses rendered by :func:`prebuilt_response`."""
+
+
+def prebuilt_response(exc, request):
+    """Response for a webob HTTP exception, rendered only once.
+
+    Webob renders the body of an HTTP exception from a template for
+    each request, depending on the ``Accept`` header. For plain
+    instances of :data:`PREBUILT_EXCEPTIONS`, without a detail, comment
+    or custom template, the status, headers and body are kept in
+    :data:`prebuilt_responses` and a new response is made from them.
+
+    :param exc: a :class:`webob.exc.HTTPException` instance.
+    :param request: the :class:`morepath.Request`.
+    :return: a :class:`morepath.Response`, or ``exc`` itself.
+    """
+    cls = exc.__class__
+    environ = request.environ
+    method = environ["REQUEST_METHOD"]
+    if (
+        cls not in PREBUILT_EXCEPTIONS
+        or method == "HEAD"
+        or exc.has_body
+        or exc.detail is not None
+        or exc.comment is not None
+        or exc.body_template_obj is not cls.body_template_obj
+        or "json_formatter" in exc.__dict__
+    ):
+        return exc
+    key = (
+        cls,
+        exc.status,
+        tuple(exc.headerlist),
+        method,
+        environ.get("HTTP_ACCEPT", ""),
+    )
+    cached = prebuilt_responses.get(key)
+    if cached is None:
+        started = []
+
+        def start_response(status, headerlist, exc_info=None):
+            started.append((status, headerlist))
+
+        body = b"".join(exc.generate_response(environ, start_response))
+        ((status, headerlist),) = started
+        cached = status, tuple(headerlist), body
+        prebuilt_responses.put(key, cached)
+    status, headerlist, body = cached
+    return Response(body=body, status=status, headerlist=list(headerlist))
@@ -36,6 +36,7 @@ from reg import methodify
 
 from .authentication import Identity, NoIdentity
 from .converter import ConverterRegistry
+from .encoder import JsonEncoderRegistry, is_fields_model
 from .mapply import mapply
 from .path import PathRegistry
 from .predicate import PredicateRegistry
@@ -43,7 +44,13 @@ from .settings import SettingRegistry
 from .template import TemplateEngineRegistry
 from .traject import Path
 from .tween import TweenRegistry
-from .view import View, render_html, render_json, render_view
+from .view import (
+    View,
+    ViewRegistry,
+    render_html,
+    render_json,
+    render_view,
+)
 
 
 def isbaseclass(a, b):
@@ -53,6 +60,8 @@ def isbaseclass(a, b):
 class SettingAction(dectate.Action):
     config = {"setting_registry": SettingRegistry}
 
+    app_class_arg = True
+
     def __init__(self, section, name):
         """Register application setting.
 
@@ -71,12 +80,17 @@ class SettingAction(dectate.Action):
         self.section = section
         self.name = name
 
-    def identifier(self, setting_registry):
+    def identifier(self, setting_registry, app_class):
         return self.section, self.name
 
-    def perform(self, obj, setting_registry):
+    def perform(self, obj, setting_registry, app_class):
         setting_registry.register_setting(self.section, self.name, obj)
 
+    @staticmethod
+    def after(setting_registry, app_class):
+        dispatch = getattr(setting_registry, "dispatch", None)
+        app_class._set_dispatch_cache_size(getattr(dispatch, "cache_size", 0))
+
 
 class SettingValue:
     def __init__(self, value):
@@ -347,6 +361,10 @@ class PathAction(dectate.Action):
             obj,
         )
 
+    @staticmethod
+    def after(path_registry):
+        path_registry.compile()
+
 
 class PathCompositeAction(dectate.Composite):
     filter_convert = {
@@ -629,6 +647,7 @@ def issubclass_or_none(a, b):
 class ViewAction(dectate.Action):
     config = {
         "template_engine_registry": TemplateEngineRegistry,
+        "view_registry": ViewRegistry,
     }
 
     depends = [SettingAction, PredicateAction, TemplateRenderAction]
@@ -729,10 +748,10 @@ class ViewAction(dectate.Action):
         result["model"] = self.model
         return result
 
-    def identifier(self, template_engine_registry, app_class):
+    def identifier(self, template_engine_registry, view_registry, app_class):
         return app_class.get_view.by_predicates(**self.key_dict()).key
 
-    def perform(self, obj, template_engine_registry, app_class):
+    def perform(self, obj, template_engine_registry, view_registry, app_class):
         render = self.render
         if self.template is not None:
             render = template_engine_registry.get_template_render(
@@ -748,6 +767,10 @@ class ViewAction(dectate.Action):
         )
         app_class.get_view.register(v, **self.key_dict())
 
+    @staticmethod
+    def after(template_engine_registry, view_registry, app_class):
+        view_registry.compile()
+
 
 class JsonAction(ViewAction):
     group_class = ViewAction
@@ -893,6 +916,7 @@ class MountAction(PathAction):
         required=None,
         get_converters=None,
         name=None,
+        cache=None,
     ):
         """Mount sub application on path.
 
@@ -920,6 +944,16 @@ class MountAction(PathAction):
           :meth:`Request.child` to allow loose coupling between mounting
           application and mounted application. Optional, and if not supplied
           the ``path`` argument is taken as the name.
+        :param cache: a :class:`morepath.LRUCache` in which to keep the
+          mounted app instances, so that the decorated function is not
+          called for each request. Instances are cached by the parent
+          app and the variables passed to the decorated function, which
+          therefore cannot have a ``request`` argument. A parent app
+          that is mounted itself is identified by its class and the
+          path it is mounted on, so the cache also works if the parent
+          app is not cached; if that path cannot be made, instances are
+          not cached. Use :meth:`App.evict_child` to remove an instance
+          from the cache. Optional.
 
         """
         super().__init__(
@@ -932,6 +966,7 @@ class MountAction(PathAction):
         )
         self.name = name or path
         self.app = app
+        self.cache = cache
 
     def discriminators(self, path_registry):
         return [("mount", self.app)]
@@ -947,6 +982,7 @@ class MountAction(PathAction):
             self.name,
             self.code_info,
             obj,
+            self.cache,
         )
 
 
@@ -958,7 +994,7 @@ class DeferLinksAction(dectate.Action):
 
     filter_compare = {"model": isbaseclass}
 
-    def __init__(self, model):
+    def __init__(self, model, per_class=False):
         """Defer link generation for model to mounted app.
 
         With ``defer_links`` you can specify that link generation for
@@ -977,9 +1013,16 @@ class DeferLinksAction(dectate.Action):
         :meth:`App.parent` and :meth:`App.child`.
 
         :param model: the class for which we want to defer linking.
+        :param per_class: if true, the decorated function promises to
+          return the same application for all instances of ``model``,
+          so that it only depends on the application instance. The
+          returned application is then cached on the application
+          instance and the function is called only once per model
+          class. Optional.
 
         """
         self.model = model
+        self.per_class = per_class
 
     def identifier(self, path_registry):
         return ("defer_links", self.model)
@@ -988,7 +1031,7 @@ class DeferLinksAction(dectate.Action):
         return [("model", self.model)]
 
     def perform(self, obj, path_registry):
-        path_registry.register_defer_links(self.model, obj)
+        path_registry.register_defer_links(self.model, obj, self.per_class)
 
 
 class DeferClassLinksAction(dectate.Action):
@@ -999,7 +1042,7 @@ class DeferClassLinksAction(dectate.Action):
 
     filter_compare = {"model": isbaseclass}
 
-    def __init__(self, model, variables):
+    def __init__(self, model, variables, per_class=False):
         """Defer class link generation for model class to mounted app.
 
         With ``defer_class_links`` you can specify that link
@@ -1025,10 +1068,16 @@ class DeferClassLinksAction(dectate.Action):
         :param variables: a function that given a model object can
           construct the variables used in the path (including any URL
           parameters).
+        :param per_class: if true, the decorated function promises to
+          return the same application whatever the variables, so that
+          it only depends on the application instance and the model
+          class. The returned application is then cached on the
+          application instance. Optional.
 
         """
         self.model = model
         self.variables = variables
+        self.per_class = per_class
 
     def identifier(self, path_registry):
         # either implement defer_links for a model or implement
@@ -1040,7 +1089,7 @@ class DeferClassLinksAction(dectate.Action):
 
     def perform(self, obj, path_registry):
         path_registry.register_defer_class_links(
-            self.model, self.variables, obj
+            self.model, self.variables, obj, self.per_class
         )
 
 
@@ -1176,7 +1225,9 @@ class VerifyIdentityAction(dectate.Action):
 
 
 class DumpJsonAction(dectate.Action):
-    config = {}
+    config = {"json_encoder_registry": JsonEncoderRegistry}
+
+    depends = [SettingAction]
 
     filter_convert = {"model": dectate.convert_dotted_name}
 
@@ -1185,6 +1236,29 @@ class DumpJsonAction(dectate.Action):
     app_class_arg = True
 
     def __init__(self, model=object):
+        self.model = model
+
+    def identifier(self, app_class, json_encoder_registry):
+        return self.model
+
+    def perform(self, obj, app_class, json_encoder_registry):
+        if isinstance(obj, type):
+            obj = json_encoder_registry.register_fields(obj)
+        app_class._dump_json.register(
+            methodify(obj, selfname="app"), obj=self.model
+        )
+
+    @staticmethod
+    def after(app_class, json_encoder_registry):
+        json_encoder_registry.compile()
+
+
+class DumpJsonCompositeAction(dectate.Composite):
+    filter_convert = {"model": dectate.convert_dotted_name}
+
+    query_classes = [DumpJsonAction]
+
+    def __init__(self, model=None):
         """Register a function that converts model to JSON.
 
         The decorated function gets ``app`` (app instance), ``obj``
@@ -1193,20 +1267,36 @@ class DumpJsonAction(dectate.Action):
         should return an JSON object. That is, a Python object that
         can be dumped to a JSON string using ``json.dump``.
 
+        The directive can also decorate a dataclass or a class with
+        ``__slots__``. The function is then generated for that class
+        when the configuration is committed, see
+        :class:`morepath.encoder.FieldsDumper`.
+
         :param model: the class of the model for which this function is
           registered. The ``self`` passed into the function is an instance
           of the model (or of a subclass). By default the model is ``object``,
-          meaning we register a function for all model classes.
+          meaning we register a function for all model classes. If the
+          directive decorates a class, the model should not be provided.
         """
         self.model = model
 
-    def identifier(self, app_class):
-        return self.model
-
-    def perform(self, obj, app_class):
-        app_class._dump_json.register(
-            methodify(obj, selfname="app"), obj=self.model
-        )
+    def actions(self, obj):
+        model = self.model
+        if isinstance(obj, type):
+            if model is not None:
+                raise dectate.DirectiveError(
+                    "@dump_json decorates class so cannot "
+                    "have explicit model: %s" % model
+                )
+            if not is_fields_model(obj):
+                raise dectate.DirectiveError(
+                    "@dump_json decorates class that is not a dataclass "
+                    "and has no __slots__: %s" % obj
+                )
+            model = obj
+        if model is None:
+            model = object
+        yield DumpJsonAction(model), obj
 
 
 class LinkPrefixAction(dectate.Action):
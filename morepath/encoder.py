@@ -0,0 +1,477 @@
+"""Encoding JSON.
+
+The :class:`JsonEncoderRegistry` turns the content of JSON views into
+the JSON body of the response. It applies the functions registered
+with :meth:`morepath.App.dump_json` and encodes the result with the
+encoder configured by the settings in the ``json`` section.
+
+The ``dump_json`` functions for dataclasses and classes with
+``__slots__`` can be generated by :class:`FieldsDumper`.
+"""
+
+import collections.abc
+import dataclasses
+import json
+import types
+import typing
+
+from .cache import MISSING, create_cache
+from .settings import SettingRegistry
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class JsonEncoderRegistry:
+    """Encode JSON for an app class.
+
+    The function registered with :meth:`morepath.App.dump_json` for a
+    class is looked up once and then kept by class, for as many classes
+    as the ``cache_size`` setting in the ``dispatch`` section allows,
+    and for all classes if it is not set. It is applied to
+    the content, and to any object in it that the encoder cannot
+    encode otherwise.
+
+    The encoder is configured by these optional settings in the
+    ``json`` section:
+
+    ``encoder``
+      ``"json"`` to use the :mod:`json` module of the standard library,
+      which is the default. ``"orjson"`` to use orjson_ if it is
+      installed, and :mod:`json` if it is not. Otherwise a
+      :class:`json.JSONEncoder` instance to use, or a function that
+      takes the object to encode and a ``default`` function for objects
+      it cannot encode, and returns a string or bytes.
+
+    ``separators``, ``sort_keys``, ``ensure_ascii``, ``indent``
+      Arguments for :class:`json.JSONEncoder`. By default the
+      separators are ``(",", ":")``, without whitespace. With orjson,
+      ``sort_keys`` and ``indent`` are supported, and output is always
+      compact UTF-8 otherwise.
+
+    .. _orjson: https://pypi.org/project/orjson/
+
+    :param setting_registry: a
+      :class:`morepath.directive.SettingRegistry` instance
+    """
+
+    factory_arguments = {"setting_registry": SettingRegistry}
+
+    app_class_arg = True
+
+    def __init__(self, app_class, setting_registry):
+        self.app_class = app_class
+        self.setting_registry = setting_registry
+        self._dumpers = create_cache(None)
+        self._fields_dumpers = []
+        self._encode = None
+        self._encode_text = None
+
+    def compile(self):
+        """Set up the encoder from the settings.
+
+        This is called at the end of configuration. It forgets the
+        ``dump_json`` functions that were looked up before, and generates
+        the functions of the :class:`FieldsDumper` instances.
+        """
+        section = getattr(self.setting_registry, "json", None)
+        encoder = getattr(section, "encoder", "json")
+        options = {
+            "separators": getattr(section, "separators", (",", ":")),
+            "sort_keys": getattr(section, "sort_keys", False),
+            "ensure_ascii": getattr(section, "ensure_ascii", True),
+            "indent": getattr(section, "indent", None),
+        }
+        dispatch = getattr(self.setting_registry, "dispatch", None)
+        self._dumpers = create_cache(getattr(dispatch, "cache_size", 0))
+        if encoder == "orjson" and orjson is not None:
+            self._encode, self._encode_text = orjson_encoders(options)
+        elif encoder == "json" or encoder == "orjson":
+            self._encode, self._encode_text = json_encoders(
+                json.JSONEncoder(**options)
+            )
+        elif isinstance(encoder, json.JSONEncoder):
+            self._encode, self._encode_text = json_encoders(encoder)
+        else:
+            self._encode, self._encode_text = function_encoders(encoder)
+        lookup = self.app_class._dump_json.by_predicates
+        for dumper in self._fields_dumpers:
+            dumper.generate(lambda cls: lookup(obj=cls).component, self.dump)
+        for dumper in self._fields_dumpers:
+            dumper.link()
+
+    def register_fields(self, model):
+        """Register a generated ``dump_json`` function for a class.
+
+        :param model: a dataclass or a class with ``__slots__``.
+        :return: the :class:`FieldsDumper` to register with
+          :meth:`morepath.App._dump_json`.
+        """
+        dumper = FieldsDumper(model)
+        self._fields_dumpers.append(dumper)
+        return dumper
+
+    def dumper(self, cls):
+        """Get the ``dump_json`` function for a class.
+
+        :param cls: the class of the objects to dump.
+        :return: the function registered for ``cls`` or a base class,
+          which takes app, obj and request arguments, or ``None``.
+        """
+        dumper = self._dumpers.get(cls, MISSING)
+        if dumper is not MISSING:
+            return dumper
+        dumper = self.app_class._dump_json.by_predicates(obj=cls).component
+        if isinstance(dumper, FieldsDumper) and dumper.dump is not None:
+            dumper = dumper.dump
+        self._dumpers.put(cls, dumper)
+        return dumper
+
+    def dump(self, app, obj, request):
+        """Dump an object as JSON.
+
+        Like :meth:`morepath.App._dump_json`, but uses the function
+        kept for the class of ``obj``.
+
+        :param app: the :class:`morepath.App` instance.
+        :param obj: any Python object to convert to JSON.
+        :param request: :class:`morepath.Request`
+        :return: JSON representation (in Python form).
+        """
+        dumper = self.dumper(obj.__class__)
+        if dumper is None:
+            return obj
+        return dumper(app, obj, request)
+
+    def encode(self, app, obj, request):
+        """Dump an object and encode it as JSON.
+
+        :param app: the :class:`morepath.App` instance.
+        :param obj: any Python object to convert to JSON.
+        :param request: :class:`morepath.Request`
+        :return: UTF-8 encoded JSON.
+        """
+        if self._encode is None:
+            self.compile()
+
+        def default(o):
+            dumper = self.dumper(o.__class__)
+            result = o if dumper is None else dumper(app, o, request)
+            if result is o:
+                raise TypeError(
+                    "Object of type %s is not JSON serializable"
+                    % o.__class__.__name__
+                )
+            return result
+
+        return self._encode(self.dump(app, obj, request), default)
+
+    def encode_text(self, obj):
+        """Encode an object as JSON, without dumping it.
+
+        :param obj: an object that the encoder can encode.
+        :return: the JSON string.
+        :raises TypeError: if ``obj`` cannot be encoded.
+        """
+        if self._encode_text is None:
+            self.compile()
+        return self._encode_text(obj)
+
+    def warmup(self, models=()):
+        """Look up the ``dump_json`` functions in advance.
+
+        This is done for the classes that ``dump_json`` functions are
+        registered for and for ``models``.
+
+        :param models: additional model classes.
+        """
+        self.compile()
+        registry = self.app_class._dump_json.key_lookup.key_lookup
+        for (model,) in list(registry.known_keys):
+            self.dumper(model)
+        for model in models:
+            self.dumper(model)
+
+
+def json_encoders(encoder):
+    """Encode functions for a :class:`json.JSONEncoder` instance.
+
+    :param encoder: the encoder to use. It is copied to pass a
+      ``default`` function. If the encoder has its own ``default``
+      method, that is used for the objects that ``default`` function
+      cannot encode.
+    :return: a tuple with a function that takes an object and a
+      ``default`` function and returns bytes, and a function that takes
+      an object and returns a string.
+    """
+    cls = encoder.__class__
+    attributes = encoder.__dict__
+    own_default = encoder.default
+    if getattr(own_default, "__func__", None) is json.JSONEncoder.default:
+        own_default = None
+
+    def encode(obj, default):
+        if own_default is not None:
+            default = chain_default(default, own_default)
+        instance = cls.__new__(cls)
+        instance.__dict__.update(attributes)
+        instance.default = default
+        return instance.encode(obj).encode("utf-8")
+
+    return encode, encoder.encode
+
+
+def chain_default(first, second):
+    """Combine two ``default`` functions for JSON encoders.
+
+    :return: a function that uses ``second`` for the objects that
+      ``first`` raises :exc:`TypeError` for.
+    """
+
+    def default(o):
+        try:
+            return first(o)
+        except TypeError:
+            return second(o)
+
+    return default
+
+
+def orjson_encoders(options):
+    """Encode functions that use orjson.
+
+    Dataclasses and dates are passed to the ``default`` function, as
+    they are with :mod:`json`, so that ``dump_json`` applies to them.
+
+    :param options: the ``json.JSONEncoder`` arguments.
+    :return: the functions like :func:`json_encoders`.
+    """
+    option = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+    )
+    if options["sort_keys"]:
+        option |= orjson.OPT_SORT_KEYS
+    if options["indent"]:
+        option |= orjson.OPT_INDENT_2
+    dumps = orjson.dumps
+
+    def encode(obj, default):
+        return dumps(obj, default, option)
+
+    def encode_text(obj):
+        return dumps(obj, None, option).decode("utf-8")
+
+    return encode, encode_text
+
+
+def function_encoders(func):
+    """Encode functions for a custom encoder function.
+
+    :param func: a function that takes an object and a ``default``
+      function, and returns a string or bytes.
+    :return: the functions like :func:`json_encoders`.
+    """
+
+    def encode(obj, default):
+        result = func(obj, default)
+        if isinstance(result, str):
+            result = result.encode("utf-8")
+        return result
+
+    def encode_text(obj):
+        result = func(obj, None)
+        if isinstance(result, bytes):
+            result = result.decode("utf-8")
+        return result
+
+    return encode, encode_text
+
+
+JSON_TYPES = (str, int, float, bool, type(None), dict, list, tuple)
+
+SEQUENCE_TYPES = (
+    list,
+    tuple,
+    set,
+    frozenset,
+    collections.abc.Sequence,
+    collections.abc.Set,
+    collections.abc.Collection,
+    collections.abc.Iterable,
+)
+
+MAPPING_TYPES = (dict, collections.abc.Mapping)
+
+UNION_TYPES = (typing.Union, types.UnionType)
+
+DUMP_ITEM = (
+    "dump_{i}(app, v, request) if v.__class__ is model_{i} "
+    "else dump(app, v, request)"
+)
+
+DUMP_TEMPLATES = {
+    "value": [
+        "    if {v}.__class__ is model_{i}:",
+        "        {v} = dump_{i}(app, {v}, request)",
+        "    elif {v} is not None:",
+        "        {v} = dump(app, {v}, request)",
+    ],
+    "items": [
+        "    if {v} is not None:",
+        "        {v} = [" + DUMP_ITEM + " for v in {v}]",
+    ],
+    "values": [
+        "    if {v} is not None:",
+        "        {v} = {{k: " + DUMP_ITEM + " for k, v in {v}.items()}}",
+    ],
+}
+
+
+class FieldsDumper:
+    """A generated ``dump_json`` function for a class.
+
+    This is registered by :meth:`morepath.App.dump_json` when it
+    decorates a class. The instances are dumped to a JSON object with
+    the fields of a dataclass, or the attributes named in ``__slots__``
+    that don't start with an underscore.
+
+    The Python code of the function is generated when the configuration
+    is committed. It calls the ``dump_json`` functions for the classes
+    of the fields directly, as given by their type hints: ``Item``,
+    ``Item | None``, ``list[Item]``, ``tuple[Item, ...]`` or ``dict[str,
+    Item]``. Values of another class are dumped with
+    :meth:`JsonEncoderRegistry.dump`. Other fields are left to the
+    encoder.
+
+    :param model: a dataclass or a class with ``__slots__``.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.dump = None
+        self.namespace = {}
+
+    def __call__(self, app, obj, request):
+        return self.dump(app, obj, request)
+
+    def generate(self, lookup, dump):
+        """Generate the function.
+
+        :param lookup: a function that takes a class and returns the
+          ``dump_json`` function registered for it, or ``None``.
+        :param dump: the function used for values of other classes,
+          which takes app, obj and request arguments.
+        """
+        namespace = {"dump": dump}
+        hints = type_hints(self.model)
+        lines = ["def dump_fields(app, obj, request):"]
+        items = []
+        for i, name in enumerate(model_fields(self.model)):
+            kind, model = field_model(hints.get(name))
+            dumper = lookup(model) if model is not None else None
+            if dumper is None:
+                items.append("%r: obj.%s" % (name, name))
+                continue
+            namespace["model_%s" % i] = model
+            namespace["dump_%s" % i] = dumper
+            item = "value_%s" % i
+            items.append("%r: %s" % (name, item))
+            lines.append("    %s = obj.%s" % (item, name))
+            lines.extend(
+                line.format(i=i, v=item) for line in DUMP_TEMPLATES[kind]
+            )
+        lines.append("    return {%s}" % ", ".join(items))
+        code = compile(
+            "\n".join(lines), "<dump_json %s>" % self.model.__name__, "exec"
+        )
+        exec(code, namespace)
+        self.dump = namespace["dump_fields"]
+        self.namespace = namespace
+
+    def link(self):
+        """Call the generated functions of nested classes directly.
+
+        This is done once the functions are generated for all
+        :class:`FieldsDumper` instances of the app class.
+        """
+        for name, value in list(self.namespace.items()):
+            if isinstance(value, FieldsDumper):
+                self.namespace[name] = value.dump
+
+
+def is_fields_model(cls):
+    """Check whether a ``dump_json`` function can be generated for a class.
+
+    :param cls: a class.
+    :return: ``True`` for dataclasses and classes with ``__slots__``.
+    """
+    return dataclasses.is_dataclass(cls) or "__slots__" in cls.__dict__
+
+
+def model_fields(cls):
+    """Get the names of the fields to dump for a class.
+
+    :param cls: a dataclass or a class with ``__slots__``.
+    :return: a list of names.
+    """
+    if dataclasses.is_dataclass(cls):
+        return [field.name for field in dataclasses.fields(cls)]
+    result = []
+    for base in reversed(cls.__mro__):
+        slots = base.__dict__.get("__slots__", ())
+        if isinstance(slots, str):
+            slots = [slots]
+        for name in slots:
+            if not name.startswith("_") and name not in result:
+                result.append(name)
+    return result
+
+
+def type_hints(cls):
+    """Get the type hints of a class.
+
+    :param cls: a class.
+    :return: a dict of names to types. It is empty if the hints cannot
+      be evaluated.
+    """
+    try:
+        return typing.get_type_hints(cls)
+    except Exception:
+        return {}
+
+
+def field_model(hint):
+    """Find the class to dump from the type hint of a field.
+
+    :param hint: the type hint, or ``None``.
+    :return: a tuple with ``"value"``, ``"items"`` or ``"values"``, for
+      a value, the items of a collection or the values of a mapping, and
+      the class of these. The class is ``None`` if there is nothing to
+      dump.
+    """
+    origin = typing.get_origin(hint)
+    args = typing.get_args(hint)
+    if origin in UNION_TYPES:
+        args = [arg for arg in args if arg is not type(None)]
+        if len(args) == 1:
+            return field_model(args[0])
+        return "value", None
+    if origin in SEQUENCE_TYPES:
+        if len(args) == 1 or (len(args) == 2 and args[1] is Ellipsis):
+            kind, model = field_model(args[0])
+            if kind == "value":
+                return "items", model
+        return "items", None
+    if origin in MAPPING_TYPES:
+        if len(args) == 2:
+            kind, model = field_model(args[1])
+            if kind == "value":
+                return "values", model
+        return "values", None
+    if isinstance(hint, type) and origin is None and hint not in JSON_TYPES:
+        return "value", hint
+    return "value", None
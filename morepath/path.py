@@ -5,18 +5,30 @@ This builds on :mod:`morepath.traject`.
 See also :class:`morepath.directive.PathRegistry`
 """
 
+import re
 from urllib.parse import quote, urlencode
 
 from dectate import DirectiveError
 from reg import arginfo, methodify
 
-from .converter import IDENTITY_CONVERTER, ConverterRegistry
+from .cache import LRUCache
+from .converter import IDENTITY_CONVERTER, Converter, ConverterRegistry
 from .error import LinkError
+from .settings import SettingRegistry
 from .traject import Path as TrajectPath
-from .traject import TrajectRegistry
+from .traject import TrajectRegistry, parse_path
 
 SPECIAL_ARGUMENTS = ["request", "app"]
 
+FLATTENED_MOUNT_CACHE_SIZE = 100
+"""The amount of parent apps for which the instance of an app mounted
+without variables is kept when mounts are flattened.
+"""
+
+is_safe_path = re.compile(r"[A-Za-z0-9_.~/-]*\Z").match
+"""Check whether a path has only characters that are not quoted in URLs.
+"""
+
 
 class PathRegistry(TrajectRegistry):
     """A registry for routes.
@@ -30,19 +42,157 @@ class PathRegistry(TrajectRegistry):
 
     :param converter_registry: a
       :class:`morepath.directive.ConverterRegistry` instance
+    :param setting_registry: a
+      :class:`morepath.directive.SettingRegistry` instance
 
     """
 
-    factory_arguments = {"converter_registry": ConverterRegistry}
+    factory_arguments = {
+        "converter_registry": ConverterRegistry,
+        "setting_registry": SettingRegistry,
+    }
 
     app_class_arg = True
 
-    def __init__(self, app_class, converter_registry):
+    def __init__(self, app_class, converter_registry, setting_registry):
         super().__init__()
         self.app_class = app_class
         self.converter_registry = converter_registry
+        self.setting_registry = setting_registry
         self.mounted = {}
         self.named_mounted = {}
+        self.cached_factories = {}
+        self.per_class_defers = set()
+        self.root_models = set()
+        self.static_mounts = {}
+        self._unflattened = None
+        self.reject_unknown = False
+        self.rejected = 0
+        self.accepted = 0
+
+    def compile(self):
+        """Compile the routes.
+
+        Takes the size of the route cache from the optional
+        ``cache_size`` setting in the ``routing`` section. By default
+        no route cache is used. The optional ``reject_unknown`` setting
+        in the same section enables :meth:`PathRegistry.rejects`. If
+        the optional ``flatten_mounts`` setting is enabled, the routes
+        of apps mounted without variables are merged in by
+        :meth:`PathRegistry.flatten` when the first request is consumed.
+
+        See :meth:`morepath.traject.TrajectRegistry.compile`.
+        """
+        routing = getattr(self.setting_registry, "routing", None)
+        self.cache_size = getattr(routing, "cache_size", 0)
+        self.reject_unknown = getattr(routing, "reject_unknown", False)
+        root = super().compile()
+        if self.static_mounts:
+            self._unflattened = dict(self.static_mounts)
+        return root
+
+    def consume(self, request):
+        """Consume a stack given route, returning object.
+
+        Flattens the routes of the mounted apps first if needed.
+
+        See :meth:`morepath.traject.TrajectRegistry.consume`.
+        """
+        if self._unflattened:
+            self.flatten()
+        return super().consume(request)
+
+    def flatten(self):
+        """Merge the routes of apps mounted without variables.
+
+        The static routes of an app mounted on a path without variables
+        and URL parameters are added to the index of static routes of
+        this registry, prefixed by the mount path. Such a route creates
+        the mounted app instance, makes it ``request.app`` and then
+        creates the model instance, so that a request is resolved in
+        one lookup through any number of these mounts. Routes with
+        variables in the mounted app are still resolved by
+        :func:`morepath.publish.resolve_model`.
+
+        A mount is skipped if this app has routes below the mount path,
+        so that these keep precedence. Mounted apps that are not
+        committed yet are flattened on a later call.
+        """
+        if self._compiled is None:
+            self.compile()
+        pending = self._unflattened
+        self._unflattened = None
+        remaining = {}
+        static = self._static
+        for key, (app, factory) in pending.items():
+            if not app.is_committed():
+                remaining[key] = app, factory
+                continue
+            node = static.get(key)
+            if node is None or node.name_nodes or node.matcher is not None:
+                continue
+            registry = app.config.path_registry
+            if registry._compiled is None:
+                registry.compile()
+            if registry._unflattened:
+                registry.flatten()
+            for child_key, child_node in registry._static.items():
+                static[child_key + key] = MountedRoute(child_node, factory)
+        self._unflattened = remaining or None
+
+    def rejects(self, environ):
+        """Check whether no route can match the path of a request.
+
+        Only the first segment of the path is checked. It cannot match
+        if there is no route with that segment, no route with a
+        variable that matches it, and no view with that name on the
+        model at the root path or on any of its subclasses, as the model
+        factory may return an instance of a subclass. If the view names
+        of these are not known, because views are looked up with custom
+        predicates, because an app is mounted on the root path or
+        because the model is ``object``, no path is rejected.
+
+        The rejected and accepted requests are counted in
+        :attr:`PathRegistry.rejected` and :attr:`PathRegistry.accepted`.
+
+        :param environ: the WSGI environment of the request.
+        :return: ``True`` if the request can be answered with 404 Not
+          Found without resolving its path.
+        """
+        if self._compiled is None:
+            self.compile()
+        try:
+            path = environ.get("PATH_INFO", "").encode("latin-1")
+            segments = parse_path(path.decode("utf-8"))
+        except UnicodeError:
+            segments = None
+        if not segments or self._may_match(segments[0]):
+            self.accepted += 1
+            return False
+        self.rejected += 1
+        return True
+
+    def _may_match(self, segment):
+        node = self._compiled
+        if (
+            node.absorb
+            or segment.startswith("+")
+            or segment in node.name_nodes
+            or (
+                node.matcher is not None
+                and node.matcher(segment, {}) is not None
+            )
+        ):
+            return True
+        view_registry = self.app_class.config.view_registry
+        for model in self.root_models:
+            if model in self.mounted or model is object:
+                return True
+            for cls in all_subclasses(model):
+                view_names = view_registry.view_names(cls)
+                if view_names is None or segment in view_names:
+                    return True
+        return False
 
     def register_path(
         self,
@@ -55,6 +205,7 @@ class PathRegistry(TrajectRegistry):
         absorb,
         code_info,
         model_factory,
+        cache=None,
     ):
         """Register a route.
 
@@ -72,6 +223,8 @@ class PathRegistry(TrajectRegistry):
           the line of code used to register the path.
         :param model_factory: function that constructs model object given
           variables extracted from path and URL parameters.
+        :param cache: optional :class:`morepath.LRUCache` in which to
+          keep the constructed app instances. Used for mounted apps.
         """
         converters = converters or {}
         if get_converters is not None:
@@ -107,9 +260,22 @@ class PathRegistry(TrajectRegistry):
 
         extra = "extra_parameters" in arguments
 
+        if not parse_path(path):
+            self.root_models.add(model)
+
+        factory = model_factory
+        if cache is not None:
+            if "request" in info.args:
+                raise DirectiveError(
+                    "Cannot cache instances of a function with "
+                    "a request argument"
+                )
+            factory = CachedAppFactory(model_factory, arguments, cache)
+            self.cached_factories[model_factory] = factory
+
         self.add_pattern(
             path,
-            model_factory,
+            factory,
             parameters,
             converters,
             absorb,
@@ -134,6 +300,7 @@ class PathRegistry(TrajectRegistry):
         mount_name,
         code_info,
         app_factory,
+        cache=None,
     ):
         """Register a mounted app.
 
@@ -151,7 +318,16 @@ class PathRegistry(TrajectRegistry):
           register this directive.
         :param app_factory: function that constructs app instance given
           variables extracted from path and URL parameters.
+        :param cache: optional :class:`morepath.LRUCache` in which to
+          keep the mounted app instances.
         """
+        routing = getattr(self.setting_registry, "routing", None)
+        flatten = getattr(routing, "flatten_mounts", False) and (
+            is_static_mount(path, app_factory)
+        )
+        if flatten and cache is None:
+            cache = LRUCache(FLATTENED_MOUNT_CACHE_SIZE)
+
         self.register_path(
             app,
             path,
@@ -162,12 +338,17 @@ class PathRegistry(TrajectRegistry):
             False,
             code_info,
             app_factory,
+            cache,
         )
 
         self.mounted[app] = app_factory
         mount_name = mount_name or path
         self.named_mounted[mount_name] = app_factory
 
+        if flatten:
+            key = tuple(reversed(parse_path(path)))
+            self.static_mounts[key] = app, self.cached_factories[app_factory]
+
     def register_path_variables(self, model, func):
         """Register variables function for a model class.
 
@@ -203,7 +384,7 @@ class PathRegistry(TrajectRegistry):
             default_path_variables, obj=model
         )
 
-    def register_defer_links(self, model, app_factory):
+    def register_defer_links(self, model, app_factory, per_class=False):
         """Register factory for app to defer links to.
 
         See :meth:`morepath.App.defer_links` for more information.
@@ -212,10 +393,16 @@ class PathRegistry(TrajectRegistry):
         :param app_factory: function that takes app instance and model
           object as arguments and should return another app instance that
           does the link generation.
+        :param per_class: if true, the returned app only depends on
+          the app instance and the model class, so it can be cached.
         """
+        if per_class:
+            self.per_class_defers.add(app_factory)
         self.app_class._deferred_link_app.register(app_factory, obj=model)
 
-    def register_defer_class_links(self, model, get_variables, app_factory):
+    def register_defer_class_links(
+        self, model, get_variables, app_factory, per_class=False
+    ):
         """Register factory for app to defer class links to.
 
         See :meth:`morepath.App.defer_class_links` for more information.
@@ -225,13 +412,188 @@ class PathRegistry(TrajectRegistry):
         :param app_factory: function that model class, app instance
           and variables dict as arguments and should return another
           app instance that does the link generation.
+        :param per_class: if true, the returned app only depends on
+          the app instance and the model class, so it can be cached.
         """
+        if per_class:
+            self.per_class_defers.add(app_factory)
         self.register_path_variables(model, get_variables)
         self.app_class._deferred_class_link_app.register(
             app_factory, model=model
         )
 
 
+class CachedAppFactory:
+    """Keep the app instances created by a mount function in a cache.
+
+    App instances are cached by the parent app they are mounted in and
+    the variables passed to the mount function. A parent app that is
+    itself mounted is identified by its class and the path it is
+    mounted on, see :func:`app_key`, so that instances are found again
+    when the parent app is created anew for each request.
+
+    Concurrent requests for an instance that is not cached yet may
+    each call the mount function; one of the instances ends up in
+    the cache.
+
+    :param app_factory: the function that constructs the app instance.
+    :param arguments: dict with the arguments of ``app_factory`` and
+      their defaults, as returned by :func:`get_arguments`.
+    :param cache: a :class:`morepath.LRUCache` or other object with
+      the same ``get``, ``put`` and ``invalidate`` methods.
+    """
+
+    def __init__(self, app_factory, arguments, cache):
+        self.app_factory = app_factory
+        self.arguments = arguments
+        self.cache = cache
+        self.wants_app = "app" in arginfo(app_factory).args
+
+    def key(self, parent, variables):
+        """The cache key for an app instance.
+
+        :param parent: the parent app instance.
+        :param variables: dict with the arguments to the mount function.
+        :return: a hashable key, or ``None`` if the parent or the
+          variables cannot be used as a key.
+        """
+        parent_key = app_key(parent)
+        if parent_key is None:
+            return None
+        values = self.arguments.copy()
+        values.update(variables)
+        values.pop("app", None)
+        key = parent_key, tuple(sorted(values.items()))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def get(self, parent, variables):
+        """Get the app instance mounted in ``parent``.
+
+        :param parent: the parent app instance.
+        :param variables: dict with the arguments to the mount function.
+        :return: the app instance with its ``parent`` set.
+        """
+        key = self.key(parent, variables)
+        if key is not None:
+            result = self.cache.get(key)
+            if result is not None:
+                # the parent may be another instance for the same path
+                result.parent = parent
+                return result
+        if self.wants_app:
+            variables = dict(variables, app=parent)
+        result = self.app_factory(**variables)
+        if result is None:
+            return None
+        result.parent = parent
+        if key is not None:
+            self.cache.put(key, result)
+        return result
+
+    def invalidate(self, parent, variables):
+        """Remove an app instance from the cache.
+
+        :param parent: the parent app instance.
+        :param variables: dict with the arguments to the mount function.
+        """
+        key = self.key(parent, variables)
+        if key is not None:
+            self.cache.invalidate(key)
+
+    def __call__(self, app, **variables):
+        return self.get(app, variables)
+
+
+def app_key(app):
+    """Identify an app instance across requests.
+
+    The root app is identified by the instance itself. An app that is
+    mounted is identified by its class and the path and URL parameters
+    of its mount, so that app instances created for different requests
+    for the same path get the same key.
+
+    :param app: a :class:`morepath.App` instance.
+    :return: a key, or ``None`` if the path of the app is not known.
+    """
+    if app.parent is None:
+        return app
+    try:
+        info = app._get_mount_path()
+    except LinkError:
+        return None
+    if info is None:
+        return None
+    return app.__class__, info.path, tuple(sorted(info.parameters.items()))
+
+
+class MountedRoute:
+    """A static route of a mounted app, flattened into its parent.
+
+    See :meth:`PathRegistry.flatten`.
+
+    :param node: the node of the route in the mounted app, or another
+      :class:`MountedRoute` if the app is mounted in turn.
+    :param factory: the :class:`CachedAppFactory` of the mount.
+    """
+
+    __slots__ = ("node", "factory")
+
+    def __init__(self, node, factory):
+        self.node = node
+        self.factory = factory
+
+    def create(self, variables, request):
+        """Create the model instance in the mounted app.
+
+        :param variables: dict with the path variables.
+        :param request: the request, its ``app`` is set to the
+          mounted app instance.
+        :return: the model instance, or ``None``.
+        """
+        app = self.factory.get(request.app, {})
+        if app is None:
+            return None
+        request.app = app
+        return self.node.create(variables, request)
+
+
+def all_subclasses(cls):
+    """Get a class and all of its subclasses.
+
+    :param cls: a class.
+    :return: a list with ``cls`` and the classes that currently exist
+      that derive from it, directly or indirectly.
+    """
+    result = [cls]
+    seen = {cls}
+    for c in result:
+        for subclass in c.__subclasses__():
+            if subclass not in seen:
+                seen.add(subclass)
+                result.append(subclass)
+    return result
+
+
+def is_static_mount(path, app_factory):
+    """Check whether an app is mounted without variables.
+
+    :param path: the mount path.
+    :param app_factory: the function that constructs the app instance.
+    :return: ``True`` if the path has no variables and the function
+      takes no arguments besides ``app``, so that the same app instance
+      can be used for every request.
+    """
+    return (
+        not TrajectPath(path).variables()
+        and not get_arguments(app_factory, SPECIAL_ARGUMENTS)
+        and "request" not in arginfo(app_factory).args
+    )
+
+
 class PathInfo:
     """Abstract representation of a path.
 
@@ -253,12 +615,17 @@ class PathInfo:
         :return: a URL with the prefix, the name and URL encoded parameters.
         """
         parts = []
-        if self.path:
-            # explicitly define safe with ~ for a workaround
-            # of this Python bug:
-            # https://bugs.python.org/issue16285
-            # tilde should not be encoded according to RFC3986
-            parts.append(quote(self.path.encode("utf-8"), "/~"))
+        path = self.path
+        if path:
+            # paths that only contain characters that need no quoting
+            # are common, so we don't quote these
+            if not is_safe_path(path):
+                # explicitly define safe with ~ for a workaround
+                # of this Python bug:
+                # https://bugs.python.org/issue16285
+                # tilde should not be encoded according to RFC3986
+                path = quote(path.encode("utf-8"), "/~")
+            parts.append(path)
         if name:
             parts.append(name)
         # add prefix in the end. Even if result is empty we always get
@@ -295,6 +662,16 @@ class Path:
         }
         self.converters = converters
         self.absorb = absorb
+        # resolve the converters in advance, as links are generated
+        # often
+        self.path_encoders = {
+            name: single_encoder(converters.get(name, IDENTITY_CONVERTER))
+            for name in path_variables
+        }
+        self.parameter_encoders = {
+            name: converters.get(name, IDENTITY_CONVERTER).encode
+            for name in self.parameter_names
+        }
 
     def get_variables_and_parameters(self, variables, extra_parameters):
         """Get converted variables and parameters.
@@ -305,26 +682,32 @@ class Path:
           path variables and converted URL parameters.
         """
         converters = self.converters
-        parameter_names = self.parameter_names
+        path_encoders = self.path_encoders
+        parameter_encoders = self.parameter_encoders
         path_variables = {}
         parameters = {}
 
         for name, value in variables.items():
-            if name not in parameter_names:
+            encode = parameter_encoders.get(name)
+            if encode is None:
                 if value is None:
                     raise LinkError(
                         "Path variable %s for path %s is None"
                         % (name, self.path)
                     )
-                path_variables[name] = converters.get(
-                    name, IDENTITY_CONVERTER
-                ).encode(value)[0]
+                encode = path_encoders.get(name)
+                if encode is None:
+                    path_variables[name] = value
+                else:
+                    path_variables[name] = encode(value)
             else:
-                if value is None or value == []:
+                if value is None or (isinstance(value, list) and not value):
                     continue
-                parameters[name] = converters.get(
-                    name, IDENTITY_CONVERTER
-                ).encode(value)
+                value = encode(value)
+                # empty arrays encode to an empty list
+                if value == []:
+                    continue
+                parameters[name] = value
         if extra_parameters:
             for name, value in extra_parameters.items():
                 parameters[name] = converters.get(
@@ -368,6 +751,26 @@ class Path:
         return PathInfo(path, url_parameters)
 
 
+def single_encoder(converter):
+    """Get a function that encodes a value into a single string.
+
+    :param converter: a :class:`morepath.Converter` or
+      :class:`morepath.converter.ListConverter` instance.
+    :return: a function that takes a value and returns a string, or
+      ``None`` if the value is used as it is.
+    """
+    if converter is IDENTITY_CONVERTER:
+        return None
+    if type(converter).encode is Converter.encode:
+        return converter.single_encode
+    encode = converter.encode
+
+    def single_encode(value):
+        return encode(value)[0]
+
+    return single_encode
+
+
 def get_arguments(callable, exclude):
     """Introspect callable to get callable arguments and their defaults.
 
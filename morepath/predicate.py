@@ -114,6 +114,7 @@ def adapt(func):
     def wrapper(d):
         return func(**d)
 
+    wrapper.func = func
     return wrapper
 
 
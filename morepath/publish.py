@@ -62,7 +62,9 @@ def resolve_model(request):
         # we found a non-app instance, return it
         if not isinstance(next, App):
             return next
-        # we found an app, make it the current app
+        # we found an app, make it the current app. A flattened
+        # route may have made a mounted app current already
+        app = request.app
         next.parent = app
         request.app = next
         app = next
@@ -79,8 +81,10 @@ def resolve_response(obj, request):
 
     If no view name exist it raises :exc:`webob.exc.HTTPNotFound`.
 
-    It then uses :meth:`morepath.App.get_view` to resolve the view for
-    the model object and the request by doing dynamic dispatch.
+    It then uses :meth:`morepath.view.ViewRegistry.get_view` to
+    resolve the view for the model object and the request. This uses
+    the compiled views, or :meth:`morepath.App.get_view` to do dynamic
+    dispatch if custom view predicates are installed.
 
     :param obj: model object to get response for.
     :param request: :class:`morepath.Request` instance.
@@ -90,7 +94,8 @@ def resolve_response(obj, request):
     view_name = request.view_name = get_view_name(request.unconsumed)
     if view_name is None:
         raise HTTPNotFound()
-    return request.app.get_view(obj, request)
+    app = request.app
+    return app.config.view_registry.get_view(app, obj, request)
 
 
 def get_view_name(stack):
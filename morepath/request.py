@@ -134,7 +134,7 @@ class Request(BaseRequest):
         predicates["model"] = obj.__class__
 
         def find(app, obj):
-            return app.get_view.by_predicates(**predicates).component
+            return app.config.view_registry.by_predicates(predicates)
 
         view, app = app._follow_defers(find, obj)
         if view is None:
@@ -193,6 +193,60 @@ class Request(BaseRequest):
 
         return info.url(self.link_prefix(app), name)
 
+    def links(self, objs, name="", default=None, app=SAME_APP):
+        """Create links (URLs) to a view on a number of model instances.
+
+        This gives the same links as calling :meth:`Request.link` for
+        each model instance, but is faster when there are many, for
+        instance to link to all items of a collection. The path
+        registered for a model class, the path to the application and
+        the link prefix are looked up once for all instances of that
+        class, instead of for each instance.
+
+        If no link can be constructed for a model instance, a
+        :exc:`morepath.error.LinkError` is raised.
+
+        :param objs: an iterable of model instances to link to. They
+          can be instances of different classes. ``None`` entries are
+          allowed.
+        :param name: the name of the view to link to. If omitted, the
+          the default view is looked up.
+        :param default: the link returned for ``None`` entries. By
+          default this is ``None``.
+        :param app: If set, change the application to which the
+          links are made. By default the links are made to objects
+          in the current application.
+        :return: a list of links, in the same order as ``objs``.
+        """
+        if app is None:
+            raise LinkError("Cannot link: app is None")
+
+        if app is SAME_APP:
+            app = self.app
+
+        getters = {}
+        prefix = None
+        result = []
+        for obj in objs:
+            if obj is None:
+                result.append(default)
+                continue
+            model = obj.__class__
+            try:
+                get_mounted_path = getters[model]
+            except KeyError:
+                get_mounted_path = getters[model] = (
+                    app._get_mounted_path_getter(model)
+                )
+            if get_mounted_path is None:
+                # the link may be deferred to another app
+                result.append(self.link(obj, name, default, app))
+                continue
+            if prefix is None:
+                prefix = self.link_prefix(app)
+            result.append(get_mounted_path(obj).url(prefix, name))
+        return result
+
     def class_link(self, model, variables=None, name="", app=SAME_APP):
         """Create a link (URL) to a view on a class.
 
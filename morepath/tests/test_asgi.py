@@ -0,0 +1,433 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from webob.exc import HTTPNotFound
+
+import morepath
+from morepath.asgi import is_async, scope_environ
+
+
+class Result:
+    def __init__(self, status, headers, body, chunks):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.chunks = chunks
+        self.text = body.decode("utf-8")
+
+
+def request(app, path, method="GET", query_string=b"", body=b"", headers=()):
+    """Publish a request through the ASGI interface of app in-process."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "root_path": "",
+        "query_string": query_string,
+        "headers": [(b"host", b"localhost")] + list(headers),
+        "server": ("localhost", 80),
+        "client": ("127.0.0.1", 12345),
+    }
+    received = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return received.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app.asgi(scope, receive, send))
+    start = sent[0]
+    assert start["type"] == "http.response.start"
+    chunks = [message["body"] for message in sent[1:]]
+    assert not sent[-1].get("more_body", False)
+    return Result(
+        start["status"],
+        {
+            name.decode("latin-1"): value.decode("latin-1")
+            for name, value in start["headers"]
+        },
+        b"".join(chunks),
+        chunks,
+    )
+
+
+def test_asgi_sync_view():
+    class App(morepath.App):
+        pass
+
+    class Model:
+        def __init__(self, id):
+            self.id = id
+
+    @App.path(path="models/{id}", model=Model)
+    def get_model(id):
+        return Model(id)
+
+    threads = []
+
+    @App.view(model=Model)
+    def default(self, request):
+        threads.append(threading.current_thread())
+        return "model %s %s" % (self.id, request.link(self))
+
+    app = App()
+    response = request(app, "/models/a")
+    assert response.status == 200
+    assert response.text == "model a http://localhost/models/a"
+    assert response.headers["content-type"] == "text/plain; charset=UTF-8"
+    assert threads[0] is not threading.main_thread()
+    assert threads[0].name.startswith("morepath")
+
+    assert request(app, "/unknown").status == 404
+
+
+def test_asgi_async_view_and_model_factory():
+    class App(morepath.App):
+        pass
+
+    class Model:
+        def __init__(self, id):
+            self.id = id
+
+    @App.path(path="models/{id}", model=Model)
+    async def get_model(id):
+        await asyncio.sleep(0)
+        if id == "missing":
+            return None
+        return Model(id)
+
+    @App.json(model=Model)
+    async def default(self, request):
+        await asyncio.sleep(0)
+
+        @request.after
+        def set_header(response):
+            response.headers["X-Id"] = self.id
+
+        return {"id": self.id, "link": request.link(self)}
+
+    @App.json(model=Model, name="other")
+    async def other(self, request):
+        return {"default": await request.view(self)}
+
+    app = App()
+    response = request(app, "/models/a")
+    assert response.status == 200
+    assert response.body == b'{"id":"a","link":"http://localhost/models/a"}'
+    assert response.headers["x-id"] == "a"
+
+    response = request(app, "/models/a/other")
+    assert response.text == (
+        '{"default":{"id":"a","link":"http://localhost/models/a"}}'
+    )
+
+    assert request(app, "/models/missing").status == 404
+
+
+def test_asgi_post_body_and_parameters():
+    class App(morepath.App):
+        pass
+
+    @App.path(path="")
+    class Root:
+        def __init__(self, q=""):
+            self.q = q
+
+    def load(request):
+        return request.json["value"]
+
+    @App.json(model=Root, request_method="POST", load=load)
+    async def post(self, request, value):
+        return {"q": self.q, "value": value}
+
+    response = request(
+        App(),
+        "/",
+        method="POST",
+        query_string=b"q=x",
+        body=b'{"value": 3}',
+        headers=[(b"content-type", b"application/json")],
+    )
+    assert response.status == 200
+    assert response.text == '{"q":"x","value":3}'
+
+
+def test_asgi_head():
+    class App(morepath.App):
+        pass
+
+    @App.path(path="")
+    class Root:
+        pass
+
+    @App.view(model=Root, request_method="HEAD")
+    def head(self, request):
+        return "body"
+
+    response = request(App(), "/", method="HEAD")
+    assert response.status == 200
+    assert response.body == b""
+
+
+def test_asgi_exception_views():
+    class App(morepath.App):
+        pass
+
+    class Model:
+        pass
+
+    class Problem(Exception):
+        pass
+
+    @App.path(path="", model=Model)
+    def get_model():
+        return Model()
+
+    @App.view(model=Model)
+    async def default(self, request):
+        raise Problem()
+
+    @App.view(model=Model, name="forbidden")
+    async def forbidden(self, request):
+        raise HTTPNotFound()
+
+    @App.view(model=Problem)
+    async def problem(self, request):
+        await asyncio.sleep(0)
+        return morepath.Response("problem", status=409)
+
+    app = App()
+    response = request(app, "/")
+    assert response.status == 409
+    assert response.text == "problem"
+    assert request(app, "/forbidden").status == 404
+
+
+def test_asgi_tweens():
+    class App(morepath.App):
+        pass
+
+    @App.path(path="")
+    class Root:
+        pass
+
+    @App.view(model=Root)
+    async def default(self, request):
+        return "root"
+
+    calls = []
+
+    @App.tween_factory()
+    def async_tween_factory(app, handler):
+        assert is_async(handler)
+
+        async def async_tween(request):
+            calls.append("async")
+            response = await handler(request)
+            response.headers["X-Async"] = "yes"
+            return response
+
+        return async_tween
+
+    @App.tween_factory(over=async_tween_factory)
+    def sync_tween_factory(app, handler):
+        def sync_tween(request):
+            calls.append(threading.current_thread() is threading.main_thread())
+            response = handler(request)
+            response.headers["X-Sync"] = "yes"
+            return response
+
+        return sync_tween
+
+    response = request(App(), "/")
+    assert response.text == "root"
+    assert response.headers["x-async"] == "yes"
+    assert response.headers["x-sync"] == "yes"
+    assert calls == [False, "async"]
+
+
+def test_asgi_sync_tweens_concurrent():
+    class App(morepath.App):
+        pass
+
+    @App.path(path="")
+    class Root:
+        pass
+
+    @App.view(model=Root)
+    async def default(self, request):
+        return "root"
+
+    same_thread = []
+
+    @App.tween_factory()
+    def inner_tween_factory(app, handler):
+        def inner_tween(request):
+            same_thread.append(request.thread == threading.get_ident())
+            return handler(request)
+
+        return inner_tween
+
+    @App.tween_factory(over=inner_tween_factory)
+    def outer_tween_factory(app, handler):
+        assert not is_async(handler)
+
+        def outer_tween(request):
+            request.thread = threading.get_ident()
+            return handler(request)
+
+        return outer_tween
+
+    app = App()
+    scope = {"type": "http", "method": "GET", "path": "/"}
+
+    async def get():
+        sent = []
+
+        async def receive():
+            return {"type": "http.request"}
+
+        async def send(message):
+            sent.append(message)
+
+        await app.asgi(scope, receive, send)
+        return sent[1]["body"]
+
+    async def main():
+        # fewer threads than requests
+        asyncio.get_running_loop().set_default_executor(executor)
+        return await asyncio.wait_for(
+            asyncio.gather(*[get() for i in range(8)]), 10
+        )
+
+    executor = ThreadPoolExecutor(2)
+    assert asyncio.run(main()) == [b"root"] * 8
+    assert same_thread == [True] * 8
+
+
+def test_asgi_mounted_app():
+    class App(morepath.App):
+        pass
+
+    class Sub(morepath.App):
+        def __init__(self, id):
+            self.id = id
+
+    @App.mount(path="sub/{id}", app=Sub)
+    def mount_sub(id):
+        return Sub(id)
+
+    @Sub.path(path="")
+    class Root:
+        pass
+
+    @Sub.view(model=Root)
+    async def default(self, request):
+        return "sub %s %s" % (request.app.id, request.link(self))
+
+    response = request(App(), "/sub/a")
+    assert response.text == "sub a http://localhost/sub/a"
+
+
+def test_asgi_streamed_body():
+    class App(morepath.App):
+        pass
+
+    @App.path(path="")
+    class Root:
+        pass
+
+    @App.view(model=Root)
+    def default(self, request):
+        return morepath.Response(app_iter=iter([b"a", b"b"]))
+
+    response = request(App(), "/")
+    assert response.body == b"ab"
+    assert response.chunks == [b"a", b"b", b""]
+
+
+def test_asgi_thread_pool_size():
+    class App(morepath.App):
+        pass
+
+    @App.setting(section="asgi", name="thread_pool_size")
+    def get_thread_pool_size():
+        return 2
+
+    App.commit()
+    assert App().thread_pool._max_workers == 2
+
+
+def test_asgi_lifespan():
+    class App(morepath.App):
+        pass
+
+    app = App()
+    received = [
+        {"type": "lifespan.startup"},
+        {"type": "lifespan.shutdown"},
+    ]
+    sent = []
+
+    async def receive():
+        return received.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app.asgi({"type": "lifespan"}, receive, send))
+    assert sent == [
+        {"type": "lifespan.startup.complete"},
+        {"type": "lifespan.shutdown.complete"},
+    ]
+    assert App.is_committed()
+
+
+def test_asgi_unsupported_scope():
+    class App(morepath.App):
+        pass
+
+    async def receive():
+        pass
+
+    async def send(message):
+        pass
+
+    with pytest.raises(ValueError):
+        asyncio.run(App().asgi({"type": "websocket"}, receive, send))
+
+
+def test_scope_environ():
+    environ = scope_environ(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/caf\xe9",
+            "root_path": "/app",
+            "query_string": b"a=1",
+            "headers": [
+                (b"host", b"example.com"),
+                (b"content-type", b"text/plain"),
+                (b"accept", b"text/html"),
+                (b"accept", b"application/json"),
+            ],
+            "server": ("example.com", 8080),
+        },
+        b"body",
+    )
+    assert environ["PATH_INFO"] == "/caf\xc3\xa9"
+    assert environ["SCRIPT_NAME"] == "/app"
+    assert environ["QUERY_STRING"] == "a=1"
+    assert environ["HTTP_HOST"] == "example.com"
+    assert environ["CONTENT_TYPE"] == "text/plain"
+    assert environ["CONTENT_LENGTH"] == "4"
+    assert environ["HTTP_ACCEPT"] == "text/html,application/json"
+    assert environ["SERVER_PORT"] == "8080"
+    assert environ["wsgi.input"].read() == b"body"
@@ -0,0 +1,326 @@
+import pytest
+from webtest import TestApp as Client
+
+import morepath
+from morepath.cache import (
+    DictCache,
+    LRUCache,
+    LRUCachingKeyLookup,
+    create_cache,
+)
+
+
+def test_lru_cache():
+    cache = LRUCache(2)
+    assert cache.get("a") is None
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    assert cache.get("b") == 2
+    assert len(cache) == 2
+    assert "a" in cache
+    assert cache.stats() == {
+        "size": 2,
+        "maxsize": 2,
+        "hits": 2,
+        "misses": 1,
+        "evictions": 0,
+    }
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    # use a, so b is the least recently used
+    cache.get("a")
+    cache.put("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_lru_cache_default():
+    cache = LRUCache(1)
+    assert cache.get("a", "default") == "default"
+
+
+def test_lru_cache_invalidate():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.invalidate("a")
+    cache.invalidate("b")
+    assert "a" not in cache
+
+
+def test_lru_cache_clear():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.get("a")
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.hits == 1
+
+
+def test_lru_cache_size():
+    with pytest.raises(ValueError):
+        LRUCache(0)
+
+
+def test_dispatch_cache_unbounded_by_default():
+    class App(morepath.App):
+        pass
+
+    App.commit()
+
+    assert App.dispatch_cache_stats() == {}
+
+
+def test_dispatch_cache_size_setting():
+    class App(morepath.App):
+        pass
+
+    @App.setting_section(section="dispatch")
+    def get_dispatch_settings():
+        return {"cache_size": 2}
+
+    class Model:
+        def __init__(self, id):
+            self.id = id
+
+    @App.path(path="{id}", model=Model)
+    def get_model(id):
+        return Model(id)
+
+    @App.view(model=Model)
+    def default(self, request):
+        return "View: %s" % self.id
+
+    @App.view(model=Model, name="edit")
+    def edit(self, request):
+        return "Edit: %s" % self.id
+
+    @App.view(model=Model, name="other")
+    def other(self, request):
+        return "Other: %s" % self.id
+
+    App.commit()
+
+    assert isinstance(App.get_view.key_lookup, LRUCachingKeyLookup)
+
+    stats = App.dispatch_cache_stats()
+    assert "get_view" in stats
+    assert "_permits" in stats
+    assert "_class_path" in stats
+    assert "_dump_json" in stats
+
+    app = App()
+
+    # the view of a model
+    model = Model("a")
+    request = app.request({"PATH_INFO": "/a"})
+    request.view_name = ""
+    assert app.get_view(model, request).body == b"View: a"
+    assert app.get_view(model, request).body == b"View: a"
+    request.view_name = "edit"
+    assert app.get_view(model, request).body == b"Edit: a"
+    request.view_name = "other"
+    assert app.get_view(model, request).body == b"Other: a"
+
+    stats = App.dispatch_cache_stats()["get_view"]
+    assert stats["size"] == 2
+    assert stats["maxsize"] == 2
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["evictions"] == 1
+
+    c = Client(app)
+    assert c.get("/b").body == b"View: b"
+    assert c.get("/b/edit").body == b"Edit: b"
+    c.get("/b/missing", status=404)
+    c.post("/b", status=405)
+
+
+def test_create_cache():
+    assert isinstance(create_cache(None), DictCache)
+    assert isinstance(create_cache(0), DictCache)
+    cache = create_cache(2)
+    assert isinstance(cache, LRUCache)
+    assert cache.size == 2
+
+    cache = create_cache(None)
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+
+
+def test_view_classes_bounded_by_cache_size_setting():
+    class App(morepath.App):
+        pass
+
+    @App.setting(section="dispatch", name="cache_size")
+    def get_dispatch_cache_size():
+        return 2
+
+    class Model:
+        pass
+
+    models = [type("Model%s" % i, (Model,), {}) for i in range(5)]
+
+    @App.path(path="{id}", model=Model)
+    def get_model(id):
+        return models[int(id)]()
+
+    @App.view(model=Model)
+    def default(self, request):
+        return self.__class__.__name__
+
+    c = Client(App())
+    for i in range(5):
+        assert c.get("/%s" % i).text == "Model%s" % i
+
+    by_class = App.config.view_registry._by_class
+    assert isinstance(by_class, LRUCache)
+    assert len(by_class) == 2
+    assert c.get("/0").text == "Model0"
+
+
+def test_view_classes_unbounded_by_default():
+    class App(morepath.App):
+        pass
+
+    App.commit()
+    assert isinstance(App.config.view_registry._by_class, DictCache)
+
+
+def test_dump_json_classes_bounded_by_cache_size_setting():
+    class App(morepath.App):
+        pass
+
+    @App.setting(section="dispatch", name="cache_size")
+    def get_dispatch_cache_size():
+        return 2
+
+    class Model:
+        pass
+
+    models = [type("Model%s" % i, (Model,), {}) for i in range(5)]
+
+    @App.path(path="{id}", model=Model)
+    def get_model(id):
+        return models[int(id)]()
+
+    @App.json(model=Model)
+    def default(self, request):
+        return self
+
+    @App.dump_json(model=Model)
+    def dump_model_json(self, request):
+        return {"name": self.__class__.__name__}
+
+    c = Client(App())
+    for i in range(5):
+        assert c.get("/%s" % i).json == {"name": "Model%s" % i}
+
+    dumpers = App.config.json_encoder_registry._dumpers
+    assert isinstance(dumpers, LRUCache)
+    assert len(dumpers) == 2
+    assert c.get("/0").json == {"name": "Model0"}
+
+
+def test_dump_json_classes_unbounded_by_default():
+    class App(morepath.App):
+        pass
+
+    App.commit()
+    assert isinstance(App.config.json_encoder_registry._dumpers, DictCache)
+
+
+def test_lru_caching_key_lookup():
+    class Registry:
+        def __init__(self):
+            self.calls = []
+
+        def component(self, key):
+            self.calls.append(("component", key))
+            return None
+
+        def fallback(self, key):
+            self.calls.append(("fallback", key))
+            return "fallback"
+
+        def all(self, key):
+            self.calls.append(("all", key))
+            return iter(["a", "b"])
+
+    registry = Registry()
+    key_lookup = LRUCachingKeyLookup(registry, 10)
+    assert key_lookup.key_lookup is registry
+
+    for i in range(2):
+        assert key_lookup.component(("x",)) is None
+        assert key_lookup.fallback(("x",)) == "fallback"
+        assert key_lookup.all(("x",)) == ["a", "b"]
+
+    assert registry.calls == [
+        ("component", ("x",)),
+        ("fallback", ("x",)),
+        ("all", ("x",)),
+    ]
+    assert key_lookup.cache.stats()["hits"] == 3
+
+
+def test_view_cache_stats():
+    class App(morepath.App):
+        pass
+
+    @App.path(path="")
+    class Root:
+        pass
+
+    class Item:
+        def __init__(self, id):
+            self.id = id
+
+    @App.view(model=Root)
+    def default(self, request):
+        return " ".join(
+            request.view(Item(i), name=name)
+            for i in range(3)
+            for name in ["", "edit"]
+        )
+
+    @App.view(model=Root, name="missing")
+    def missing(self, request):
+        return repr(request.view(Item(1), name="missing"))
+
+    @App.view(model=Item)
+    def item_default(self, request):
+        return "item%s" % self.id
+
+    @App.view(model=Item, name="edit")
+    def item_edit(self, request):
+        return "edit%s" % self.id
+
+    c = Client(App())
+
+    response = c.get("/")
+    assert response.body == b"item0 edit0 item1 edit1 item2 edit2"
+    stats = App.view_cache_stats()
+    assert stats["size"] == 2
+    assert stats["misses"] == 2
+    assert stats["hits"] == 4
+
+    assert c.get("/missing").body == b"None"
+    assert App.view_cache_stats()["size"] == 3
+
+    # registering a view clears the cache
+    @App.view(model=Item, name="missing")
+    def item_missing(self, request):
+        return "missing%s" % self.id
+
+    App.commit()
+
+    assert App.view_cache_stats()["size"] == 0
+    assert c.get("/missing").body == b"'missing1'"
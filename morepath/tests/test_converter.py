@@ -1,12 +1,24 @@
+from array import array
+from datetime import date, datetime
+from time import mktime, strptime
+
 import pytest
 
 from dectate import DirectiveError
 
 from ..converter import (
     IDENTITY_CONVERTER,
+    ArrayConverter,
     Converter,
     ConverterRegistry,
     ListConverter,
+    array_of,
+)
+from ..core import (
+    date_decode,
+    date_encode,
+    datetime_decode,
+    datetime_encode,
 )
 
 
@@ -103,3 +115,116 @@ def test_converter_equality():
     assert l0 == l2
     assert l1 != l3
     assert not l1 == l3
+
+
+def test_date_decode():
+    assert date_decode("20121110") == date(2012, 11, 10)
+    assert date_decode("00010101") == date(1, 1, 1)
+    assert date_encode(date(2012, 11, 10)) == "20121110"
+
+
+@pytest.mark.parametrize(
+    "s",
+    [
+        "",
+        "broken",
+        "2012111",
+        "201211100",
+        "20121310",
+        "2012-1-1",
+        "２０１２１１１０",
+    ],
+)
+def test_date_decode_invalid(s):
+    with pytest.raises(ValueError):
+        date_decode(s)
+
+
+def test_datetime_decode():
+    assert datetime_decode("20121110T144530") == datetime(
+        2012, 11, 10, 14, 45, 30
+    )
+    assert (
+        datetime_encode(datetime(2012, 11, 10, 14, 45, 30)) == "20121110T144530"
+    )
+
+
+@pytest.mark.parametrize(
+    "s",
+    [
+        "",
+        "broken",
+        "20121110",
+        "20121110 144530",
+        "20121110T14453",
+        "20121110T246000",
+        "20121110T-14530",
+    ],
+)
+def test_datetime_decode_invalid(s):
+    with pytest.raises(ValueError):
+        datetime_decode(s)
+
+
+@pytest.mark.parametrize("s", ["20121110", "19991231", "20000229", "20991231"])
+def test_date_decode_strptime(s):
+    assert date_decode(s) == date.fromtimestamp(mktime(strptime(s, "%Y%m%d")))
+
+
+@pytest.mark.parametrize(
+    "s", ["20121110T144530", "19700102T000000", "20000229T235959"]
+)
+def test_datetime_decode_strptime(s):
+    assert datetime_decode(s) == datetime.fromtimestamp(
+        mktime(strptime(s, "%Y%m%dT%H%M%S"))
+    )
+
+
+def test_array_converter():
+    r = ConverterRegistry()
+    r.register_converter(int, Converter(int))
+    r.register_converter(float, Converter(float))
+
+    c = r.actual_converter(array_of(int))
+    assert c.decode(["1", "2"]) == array("q", [1, 2])
+    assert c.decode([]) == array("q")
+    assert c.encode(array("q", [1, 2])) == ["1", "2"]
+    assert not c.is_missing([])
+    with pytest.raises(ValueError):
+        c.decode(["1", "a"])
+    with pytest.raises(ValueError):
+        c.decode([str(2**64)])
+
+    c = r.actual_converter(array_of(float))
+    assert c.decode(["1.5"]) == array("d", [1.5])
+
+    c = r.actual_converter(array_of(int, typecode="i"))
+    assert c.decode(["1"]).typecode == "i"
+
+
+def test_array_converter_equality():
+    assert array_of(int) == array_of(int)
+    assert array_of(int) != array_of(int, typecode="i")
+    assert array_of(int) != ListConverter(int)
+    assert ListConverter(int) != array_of(int)
+    converter = ArrayConverter(Converter(int), "q")
+    assert converter.with_converter(converter.converter) is converter
+
+
+def test_array_of_unknown_typecode():
+    with pytest.raises(DirectiveError):
+        array_of(str)
+
+
+def test_array_converter_numpy():
+    numpy = pytest.importorskip("numpy")
+    c = ConverterRegistry().actual_converter(
+        array_of(Converter(int), typecode="q", numpy=True)
+    )
+    result = c.decode(["1", "2"])
+    assert isinstance(result, numpy.ndarray)
+    assert result.dtype == numpy.dtype("q")
+    assert result.tolist() == [1, 2]
+    assert c.encode(result) == ["1", "2"]
+    with pytest.raises(ValueError):
+        c.decode(["1", "a"])
@@ -975,3 +975,211 @@ def test_defer_links_and_defer_links_conflict():
 
     with pytest.raises(ConflictError):
         Root.commit()
+
+
+def test_defer_links_batch():
+    class Root(morepath.App):
+        pass
+
+    class Sub(morepath.App):
+        pass
+
+    @Root.path(path="")
+    class RootModel:
+        pass
+
+    @Root.view(model=RootModel)
+    def root_model_default(self, request):
+        return "\n".join(request.links([RootModel(), SubModel(), RootModel()]))
+
+    @Sub.path(path="")
+    class SubModel:
+        pass
+
+    @Root.mount(app=Sub, path="sub")
+    def mount_sub():
+        return Sub()
+
+    @Root.defer_links(model=SubModel)
+    def defer_links_sub_model(app, obj):
+        return app.child(Sub())
+
+    c = Client(Root())
+
+    response = c.get("/")
+    assert response.body == (
+        b"http://localhost/\nhttp://localhost/sub\nhttp://localhost/"
+    )
+
+
+def test_defer_links_per_class():
+    class Root(morepath.App):
+        pass
+
+    class Sub(morepath.App):
+        pass
+
+    @Root.path(path="")
+    class RootModel:
+        pass
+
+    @Root.view(model=RootModel)
+    def root_model_default(self, request):
+        return " ".join(
+            [
+                request.link(SubModel()),
+                request.link(SubModel(), "edit"),
+                request.view(SubModel()),
+            ]
+        )
+
+    @Sub.path(path="")
+    class SubModel:
+        pass
+
+    @Sub.view(model=SubModel)
+    def sub_model_default(self, request):
+        return "view"
+
+    @Root.mount(app=Sub, path="sub")
+    def mount_sub():
+        return Sub()
+
+    calls = []
+
+    @Root.defer_links(model=SubModel, per_class=True)
+    def defer_links_sub_model(app, obj):
+        calls.append(obj)
+        return app.child(Sub())
+
+    root = Root()
+    c = Client(root)
+
+    response = c.get("/")
+    assert response.body == (
+        b"http://localhost/sub http://localhost/sub/edit view"
+    )
+    assert len(calls) == 1
+
+    c.get("/")
+    assert len(calls) == 1
+
+    # a new app instance has its own cache
+    Client(Root()).get("/")
+    assert len(calls) == 2
+
+
+def test_defer_links_not_per_class():
+    class Root(morepath.App):
+        pass
+
+    class Sub(morepath.App):
+        pass
+
+    @Root.path(path="")
+    class RootModel:
+        pass
+
+    @Root.view(model=RootModel)
+    def root_model_default(self, request):
+        return request.link(SubModel()) + " " + request.link(SubModel())
+
+    @Sub.path(path="")
+    class SubModel:
+        pass
+
+    @Root.mount(app=Sub, path="sub")
+    def mount_sub():
+        return Sub()
+
+    calls = []
+
+    @Root.defer_links(model=SubModel)
+    def defer_links_sub_model(app, obj):
+        calls.append(obj)
+        return app.child(Sub())
+
+    c = Client(Root())
+
+    response = c.get("/")
+    assert response.body == b"http://localhost/sub http://localhost/sub"
+    assert len(calls) == 2
+
+
+def test_defer_class_links_per_class():
+    class Root(morepath.App):
+        pass
+
+    class Sub(morepath.App):
+        pass
+
+    @Root.path(path="")
+    class RootModel:
+        pass
+
+    @Root.view(model=RootModel)
+    def root_model_default(self, request):
+        return " ".join(
+            [
+                request.class_link(SubModel, variables={"id": "a"}),
+                request.class_link(SubModel, variables={"id": "b"}),
+                request.link(SubModel("c")),
+            ]
+        )
+
+    @Sub.path(path="{id}")
+    class SubModel:
+        def __init__(self, id):
+            self.id = id
+
+    @Root.mount(app=Sub, path="sub")
+    def mount_sub():
+        return Sub()
+
+    calls = []
+
+    @Root.defer_class_links(
+        model=SubModel, variables=lambda obj: {"id": obj.id}, per_class=True
+    )
+    def defer_class_links_sub_model(app, model, variables):
+        calls.append(variables)
+        return app.child(Sub())
+
+    c = Client(Root())
+
+    response = c.get("/")
+    assert response.body == (
+        b"http://localhost/sub/a http://localhost/sub/b "
+        b"http://localhost/sub/c"
+    )
+    assert calls == [{"id": "a"}, {"id": "c"}]
+
+    c.get("/")
+    assert calls == [{"id": "a"}, {"id": "c"}]
+
+
+def test_defer_links_per_class_circular():
+    class Root(morepath.App):
+        pass
+
+    @Root.path(path="")
+    class RootModel:
+        pass
+
+    class Model:
+        pass
+
+    @Root.view(model=RootModel)
+    def root_model_default(self, request):
+        return request.link(Model())
+
+    @Root.defer_links(model=Model, per_class=True)
+    def defer_links_model(app, obj):
+        return app
+
+    c = Client(Root())
+
+    with pytest.raises(LinkError):
+        c.get("/")
+    with pytest.raises(LinkError):
+        c.get("/")
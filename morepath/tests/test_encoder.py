@@ -0,0 +1,448 @@
+import dataclasses
+import json
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Optional
+
+import pytest
+from dectate import DirectiveReportError
+from webtest import TestApp as Client
+
+import morepath
+from morepath.encoder import model_fields
+
+
+class Item:
+    def __init__(self, x):
+        self.x = x
+
+
+@dataclass
+class Tag:
+    name: str
+
+
+@dataclass
+class Node:
+    name: str
+    tag: Optional[Tag] = None
+    children: "list[Node]" = field(default_factory=list)
+    tags: "dict[str, Tag]" = field(default_factory=dict)
+    extra: object = None
+
+
+class Slotted:
+    __slots__ = ("x", "_cache")
+
+    def __init__(self, x):
+        self.x = x
+        self._cache = None
+
+
+class SubSlotted(Slotted):
+    __slots__ = "y"
+
+    def __init__(self, x, y):
+        super().__init__(x)
+        self.y = y
+
+
+def make_app(**settings):
+    class App(morepath.App):
+        pass
+
+    for name, value in settings.items():
+        App.setting(section="json", name=name)(lambda value=value: value)
+
+    @App.path(path="")
+    class Root:
+        pass
+
+    @App.json(model=Root)
+    def default(self, request):
+        return {"b": [Item(1), Item(2)], "a": Item(3)}
+
+    @App.dump_json(model=Item)
+    def dump_item_json(self, request):
+        return {"x": self.x}
+
+    return App
+
+
+def test_render_json_nested_dump_json():
+    App = make_app()
+    response = Client(App()).get("/")
+    assert response.body == b'{"b":[{"x":1},{"x":2}],"a":{"x":3}}'
+    assert response.content_type == "application/json"
+    registry = App.config.json_encoder_registry
+    assert registry.dumper(Item) is not None
+    assert Item in registry._dumpers
+
+
+def test_render_json_not_serializable():
+    class App(morepath.App):
+        pass
+
+    @App.path(path="")
+    class Root:
+        pass
+
+    @App.json(model=Root)
+    def default(self, request):
+        return {"a": object()}
+
+    with pytest.raises(TypeError):
+        Client(App()).get("/")
+
+
+def test_render_json_settings():
+    App = make_app(sort_keys=True, indent=2, separators=(",", ": "))
+    response = Client(App()).get("/")
+    assert response.text == json.dumps(
+        {"a": {"x": 3}, "b": [{"x": 1}, {"x": 2}]},
+        sort_keys=True,
+        indent=2,
+    )
+
+
+def test_render_json_encoder_instance():
+    class DecimalEncoder(json.JSONEncoder):
+        def default(self, o):
+            if isinstance(o, Decimal):
+                return str(o)
+            return super().default(o)
+
+    class App(morepath.App):
+        pass
+
+    @App.setting(section="json", name="encoder")
+    def get_encoder():
+        return DecimalEncoder(separators=(",", ":"))
+
+    @App.path(path="")
+    class Root:
+        pass
+
+    @App.json(model=Root)
+    def default(self, request):
+        return [Decimal("1.5"), Item(1)]
+
+    @App.dump_json(model=Item)
+    def dump_item_json(self, request):
+        return {"x": self.x}
+
+    assert Client(App()).get("/").body == b'["1.5",{"x":1}]'
+
+
+def test_render_json_encoder_function():
+    def encode(obj, default):
+        return json.dumps(obj, default=default, separators=(", ", ": "))
+
+    App = make_app(encoder=encode)
+    response = Client(App()).get("/")
+    assert response.body == b'{"b": [{"x": 1}, {"x": 2}], "a": {"x": 3}}'
+
+
+def test_render_json_orjson():
+    pytest.importorskip("orjson")
+
+    @dataclass
+    class Point:
+        x: int
+        y: int
+
+    App = make_app(encoder="orjson")
+
+    @App.json(model=Item)
+    def item_default(self, request):
+        return {1: Point(1, 2), "items": [Item(1)]}
+
+    @App.path(path="item", model=Item)
+    def get_item():
+        return Item(0)
+
+    @App.dump_json(model=Point)
+    def dump_point_json(self, request):
+        return [self.x, self.y]
+
+    c = Client(App())
+    assert c.get("/").body == b'{"b":[{"x":1},{"x":2}],"a":{"x":3}}'
+    assert c.get("/item").body == b'{"1":[1,2],"items":[{"x":1}]}'
+
+
+def test_render_json_stream_uses_encoder():
+    App = make_app(sort_keys=True)
+
+    @App.path(path="stream", model=Item)
+    def get_item():
+        return Item(0)
+
+    @App.json(model=Item, render=morepath.render_json_stream)
+    def item_default(self, request):
+        return ({"b": n, "a": n} for n in range(2))
+
+    response = Client(App()).get("/stream")
+    assert response.body == b'[{"a":0,"b":0},{"a":1,"b":1}]'
+
+
+@pytest.mark.parametrize("encoder", ["json", "orjson"])
+def test_render_json_stream_indent(encoder):
+    if encoder == "orjson":
+        pytest.importorskip("orjson")
+    App = make_app(encoder=encoder, indent=2)
+
+    @App.path(path="stream", model=Item)
+    def get_item():
+        return Item(0)
+
+    @App.json(model=Item, render=morepath.render_json_stream)
+    def item_default(self, request):
+        return {"items": (Item(n) for n in range(2)), 1: {"a": Item(2)}}
+
+    response = Client(App()).get("/stream")
+    assert json.loads(response.body) == {
+        "items": [{"x": 0}, {"x": 1}],
+        "1": {"a": {"x": 2}},
+    }
+
+
+def test_warmup_dump_json():
+    App = make_app()
+    App().warmup(freeze=False)
+    assert Item in App.config.json_encoder_registry._dumpers
+
+
+def test_dump_json_dataclass():
+    class App(morepath.App):
+        pass
+
+    App.dump_json()(Tag)
+    App.dump_json()(Node)
+
+    @App.dump_json(model=Item)
+    def dump_item_json(self, request):
+        return {"x": self.x}
+
+    App.commit()
+    app = App()
+    request = morepath.Request.blank("/", app=app)
+    node = Node(
+        "a",
+        Tag("t"),
+        [Node("b"), Node("c", children=[Node("d")])],
+        {"k": Tag("u")},
+        Item(1),
+    )
+    assert app._dump_json(node, request) == {
+        "name": "a",
+        "tag": {"name": "t"},
+        "children": [
+            {
+                "name": "b",
+                "tag": None,
+                "children": [],
+                "tags": {},
+                "extra": None,
+            },
+            {
+                "name": "c",
+                "tag": None,
+                "children": [
+                    {
+                        "name": "d",
+                        "tag": None,
+                        "children": [],
+                        "tags": {},
+                        "extra": None,
+                    }
+                ],
+                "tags": {},
+                "extra": None,
+            },
+        ],
+        "tags": {"k": {"name": "u"}},
+        "extra": node.extra,
+    }
+    registry = App.config.json_encoder_registry
+    assert registry.encode(app, node, request) == (
+        b'{"name":"a","tag":{"name":"t"},"children":['
+        b'{"name":"b","tag":null,"children":[],"tags":{},"extra":null},'
+        b'{"name":"c","tag":null,"children":[{"name":"d","tag":null,'
+        b'"children":[],"tags":{},"extra":null}],"tags":{},"extra":null}],'
+        b'"tags":{"k":{"name":"u"}},"extra":{"x":1}}'
+    )
+
+
+def test_dump_json_dataclass_subclass_value():
+    class App(morepath.App):
+        pass
+
+    @dataclass
+    class SpecialTag(Tag):
+        special: bool = True
+
+    App.dump_json()(Tag)
+    App.dump_json()(Node)
+    App.dump_json()(SpecialTag)
+
+    App.commit()
+    app = App()
+    request = morepath.Request.blank("/", app=app)
+    node = Node("a", SpecialTag("t"), tags={"k": SpecialTag("u", False)})
+    result = app._dump_json(node, request)
+    assert result["tag"] == {"name": "t", "special": True}
+    assert result["tags"] == {"k": {"name": "u", "special": False}}
+
+
+def test_dump_json_slots():
+    class App(morepath.App):
+        pass
+
+    App.dump_json()(Slotted)
+    App.dump_json()(SubSlotted)
+
+    @App.path(path="")
+    class Root:
+        pass
+
+    @App.json(model=Root)
+    def default(self, request):
+        return [Slotted(1), SubSlotted(2, 3)]
+
+    response = Client(App()).get("/")
+    assert response.json == [{"x": 1}, {"x": 2, "y": 3}]
+
+
+def test_dump_json_class_with_model():
+    class App(morepath.App):
+        pass
+
+    @App.dump_json(model=Tag)
+    @dataclass
+    class Other:
+        pass
+
+    with pytest.raises(DirectiveReportError):
+        App.commit()
+
+
+def test_dump_json_class_without_fields():
+    class App(morepath.App):
+        pass
+
+    @App.dump_json()
+    class Plain:
+        pass
+
+    with pytest.raises(DirectiveReportError):
+        App.commit()
+
+
+def test_dump_json_generated_same_as_generic():
+    @dataclass
+    class Empty:
+        pass
+
+    @dataclass
+    class Child(Node):
+        level: int = 0
+        empty: Optional[Empty] = None
+
+    class EmptySlots:
+        __slots__ = ()
+
+    class App(morepath.App):
+        pass
+
+    for cls in [Tag, Node, Child, Empty, Slotted, SubSlotted, EmptySlots]:
+        App.dump_json()(cls)
+
+    class GenericApp(morepath.App):
+        pass
+
+    @GenericApp.dump_json()
+    def dump_generic(app, self, request):
+        if dataclasses.is_dataclass(self):
+            names = [f.name for f in dataclasses.fields(self)]
+        elif hasattr(self, "__slots__"):
+            names = model_fields(type(self))
+        else:
+            return self
+        return {
+            name: json.loads(
+                json.dumps(
+                    getattr(self, name),
+                    default=lambda o: app._dump_json(o, request),
+                )
+            )
+            for name in names
+        }
+
+    objs = [
+        Tag("t"),
+        Node("a", Tag("t"), [Node("b")], {"k": Tag("u")}),
+        Child("c", Tag("t"), [Child("d", level=2)], level=1, empty=Empty()),
+        Empty(),
+        Slotted(1),
+        SubSlotted(2, Tag("t")),
+        EmptySlots(),
+    ]
+
+    def dump_all(app_class):
+        app_class.commit()
+        app = app_class()
+        request = morepath.Request.blank("/", app=app)
+        registry = app_class.config.json_encoder_registry
+        return [json.loads(registry.encode(app, obj, request)) for obj in objs]
+
+    generated = dump_all(App)
+    assert generated == dump_all(GenericApp)
+    assert generated[3] == {}
+    assert generated[5] == {"x": 2, "y": {"name": "t"}}
+    assert generated[6] == {}
+    assert generated[2]["level"] == 1
+    assert generated[2]["children"][0]["level"] == 2
+
+
+def test_encoder_orjson_same_json():
+    orjson = pytest.importorskip("orjson")
+
+    payload = {
+        "total": 3,
+        "items": [
+            {
+                "id": n,
+                "title": "Item \xe9 %s" % n,
+                "price": n * 1.5,
+                "tags": ["a", "b"],
+                "active": n % 2 == 0,
+                "owner": Item(n),
+            }
+            for n in range(3)
+        ],
+    }
+
+    def encode(**settings):
+        App = make_app(**settings)
+        App.commit()
+        app = App()
+        request = morepath.Request.blank("/", app=app)
+        registry = App.config.json_encoder_registry
+        return registry.encode(app, payload, request)
+
+    assert json.loads(encode()) == orjson.loads(encode(encoder="orjson"))
+
+
+def test_dumper_same_as_dump_json():
+    class SubItem(Item):
+        pass
+
+    App = make_app()
+    App.commit()
+    app = App()
+    request = morepath.Request.blank("/", app=app)
+    registry = App.config.json_encoder_registry
+    for obj in [Item(1), SubItem(2), "text", None, [Item(3)]]:
+        assert registry.dump(app, obj, request) == app._dump_json(obj, request)
+    assert registry.dumper(SubItem) is registry.dumper(Item)
+    assert registry.dumper(str) is None
@@ -1,8 +1,10 @@
 import pytest
-from webob.exc import HTTPNotFound
+from webob import Request as WebobRequest
+from webob.exc import HTTPMethodNotAllowed, HTTPNotFound
 from webtest import TestApp as Client
 
 import morepath
+from morepath.core import prebuilt_responses
 
 
 def test_404_http_exception():
@@ -157,3 +159,92 @@ def test_excview_in_mounted_app():
     c = Client(App())
     response = c.get("/sub")
     assert response.body == b"Default error"
+
+
+@pytest.mark.parametrize(
+    "accept", ["", "text/html", "application/json", "text/plain"]
+)
+@pytest.mark.parametrize("exc_class", [HTTPNotFound, HTTPMethodNotAllowed])
+@pytest.mark.parametrize("method", ["GET", "POST", "HEAD"])
+def test_prebuilt_exception_response(accept, exc_class, method):
+    class app(morepath.App):
+        pass
+
+    @app.path(path="")
+    class Root:
+        pass
+
+    @app.view(model=Root, request_method=method)
+    def default(self, request):
+        raise exc_class()
+
+    def webob_response():
+        request = WebobRequest.blank("/", method=method)
+        if accept:
+            request.headers["Accept"] = accept
+        return request.get_response(exc_class())
+
+    expected = webob_response()
+    c = Client(app())
+    headers = {"Accept": accept} if accept else {}
+    for i in range(2):
+        response = c.request("/", method=method, headers=headers, status="*")
+        assert response.status == expected.status
+        assert response.content_type == expected.content_type
+        assert response.body == expected.body
+        assert response.content_length == expected.content_length
+
+
+def test_prebuilt_exception_response_reused():
+    class app(morepath.App):
+        pass
+
+    @app.path(path="")
+    class Root:
+        pass
+
+    @app.view(model=Root)
+    def default(self, request):
+        raise HTTPNotFound()
+
+    @app.view(model=Root, name="detail")
+    def detail(self, request):
+        raise HTTPNotFound("Detail")
+
+    c = Client(app())
+    headers = {"Accept": "text/x-prebuilt"}
+
+    c.get("/", headers=headers, status=404)
+    hits = prebuilt_responses.hits
+    response = c.get("/", headers=headers, status=404)
+    assert prebuilt_responses.hits == hits + 1
+    assert b"could not be found" in response.body
+
+    response = c.get("/detail", headers=headers, status=404)
+    assert prebuilt_responses.hits == hits + 1
+    assert b"Detail" in response.body
+
+
+def test_excview_lookup_cached():
+    class app(morepath.App):
+        pass
+
+    @app.path(path="")
+    class Root:
+        pass
+
+    class MyException(Exception):
+        pass
+
+    @app.view(model=Root)
+    def default(self, request):
+        raise MyException()
+
+    @app.view(model=MyException)
+    def my_exception(self, request):
+        return "My exception"
+
+    c = Client(app())
+    c.get("/")
+    c.get("/")
+    assert app.view_cache_stats()["hits"] == 1
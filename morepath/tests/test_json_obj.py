@@ -1,6 +1,8 @@
+import pytest
 from webtest import TestApp as Client
 
 import morepath
+import morepath.view
 
 
 def test_json_obj_dump():
@@ -48,3 +50,93 @@ def test_json_obj_dump_app_arg():
 
     response = c.get("/models/foo")
     assert response.json == {"x": "foo"}
+
+
+def test_render_json_stream(monkeypatch):
+    monkeypatch.setattr(morepath.view, "JSON_CHUNK_SIZE", 10)
+
+    class App(morepath.App):
+        pass
+
+    class Item:
+        def __init__(self, x):
+            self.x = x
+
+    @App.path(path="")
+    class Root:
+        pass
+
+    consumed = []
+
+    def items():
+        for x in range(3):
+            consumed.append(x)
+            yield Item(x)
+
+    @App.json(model=Root, render=morepath.render_json_stream)
+    def default(self, request):
+        return {
+            "items": items(),
+            "nested": [(x for x in "ab"), Item("c")],
+            1: None,
+        }
+
+    @App.dump_json(model=Item)
+    def dump_item_json(self, request):
+        return {"x": self.x}
+
+    app = App()
+    request = morepath.Request.blank("/", app=app)
+    response = app.publish(request)
+    assert response.content_type == "application/json"
+    assert consumed == []
+    chunks = list(response.app_iter)
+    assert consumed == [0, 1, 2]
+    assert len(chunks) > 1
+    assert all(len(chunk) >= 10 for chunk in chunks[:-1])
+    assert b"".join(chunks) == (
+        b'{"items":[{"x":0},{"x":1},{"x":2}],'
+        b'"nested":[["a","b"],{"x":"c"}],"1":null}'
+    )
+
+    c = Client(App())
+    assert c.get("/").json == {
+        "items": [{"x": 0}, {"x": 1}, {"x": 2}],
+        "nested": [["a", "b"], {"x": "c"}],
+        "1": None,
+    }
+
+
+def test_render_json_stream_generator():
+    class App(morepath.App):
+        pass
+
+    @App.path(path="")
+    class Root:
+        pass
+
+    @App.json(model=Root, render=morepath.render_json_stream)
+    def default(self, request):
+        return ({"n": n} for n in range(1000))
+
+    response = Client(App()).get("/")
+    assert response.json == [{"n": n} for n in range(1000)]
+    assert response.content_type == "application/json"
+
+
+def test_render_json_stream_not_serializable():
+    class App(morepath.App):
+        pass
+
+    @App.path(path="")
+    class Root:
+        pass
+
+    @App.json(model=Root, render=morepath.render_json_stream)
+    def default(self, request):
+        return [object()]
+
+    app = App()
+    response = app.publish(morepath.Request.blank("/", app=app))
+    with pytest.raises(TypeError):
+        list(response.app_iter)
@@ -1,7 +1,9 @@
 import pytest
 
 from morepath.app import App
-from morepath.converter import Converter
+from morepath.converter import Converter, ListConverter
+from morepath.error import LinkError
+from morepath.path import PathInfo
 
 
 @pytest.fixture
@@ -190,3 +192,61 @@ def test_class_path_extra_parameters_convert(info):
     info = app._class_path(Foo, {"extra_parameters": {"a": 1, "b": "B"}})
     assert info.path == "foos"
     assert info.parameters == {"a": ["1"], "b": ["B"]}
+
+
+def test_class_path_variables_with_list_converter(info):
+    app, r = info
+
+    class Foo:
+        pass
+
+    r.register_inverse_path(
+        model=Foo,
+        path="/foos/{value}",
+        factory_args={"value"},
+        converters={"value": ListConverter(Converter(int))},
+    )
+    info = app._class_path(Foo, {"value": [1]})
+    assert info.path == "foos/1"
+    assert info.parameters == {}
+
+
+def test_class_path_variable_none(info):
+    app, r = info
+
+    class Foo:
+        pass
+
+    r.register_inverse_path(
+        model=Foo, path="/foos/{value}", factory_args={"value"}
+    )
+    with pytest.raises(LinkError):
+        app._class_path(Foo, {"value": None})
+
+
+def test_path_info_url():
+    assert PathInfo("", {}).url("http://localhost", "") == "http://localhost/"
+    assert (
+        PathInfo("foo/bar-1_2.3~", {}).url("http://localhost", "edit")
+        == "http://localhost/foo/bar-1_2.3~/edit"
+    )
+
+
+def test_path_info_url_quoted():
+    assert (
+        PathInfo("foo bar/\u00e9", {}).url("http://localhost", "")
+        == "http://localhost/foo%20bar/%C3%A9"
+    )
+    assert (
+        PathInfo("a?b#c", {}).url("http://localhost", "")
+        == "http://localhost/a%3Fb%23c"
+    )
+
+
+def test_path_info_url_parameters():
+    assert (
+        PathInfo("foo", {"b": ["2"], "a": ["1", "~"]}).url(
+            "http://localhost", ""
+        )
+        == "http://localhost/foo?a=1&a=~&b=2"
+    )
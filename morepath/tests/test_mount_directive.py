@@ -2,7 +2,7 @@ import pytest
 from webtest import TestApp as Client
 
 import morepath
-from morepath.error import ConflictError, LinkError
+from morepath.error import ConfigError, ConflictError, LinkError
 
 
 def test_model_mount_conflict():
@@ -1197,3 +1197,429 @@ def test_breadthfist_vs_inheritance_on_commit():
 
     response = c.get("/x/y")
     assert response.body == b"ExtendedApp1"
+
+
+def test_mount_cache():
+    class App(morepath.App):
+        pass
+
+    class Tenant(morepath.App):
+        def __init__(self, id):
+            self.id = id
+
+    @Tenant.path(path="")
+    class TenantRoot:
+        pass
+
+    @Tenant.view(model=TenantRoot)
+    def tenant_default(self, request):
+        return "%s %s" % (request.app.id, id(request.app))
+
+    created = []
+    cache = morepath.LRUCache(10)
+
+    @App.mount(path="tenants/{id}", app=Tenant, cache=cache)
+    def get_tenant(id):
+        created.append(id)
+        return Tenant(id=id)
+
+    app = App()
+    c = Client(app)
+
+    first = c.get("/tenants/a").body
+    assert c.get("/tenants/a").body == first
+    assert created == ["a"]
+
+    c.get("/tenants/b")
+    assert created == ["a", "b"]
+    assert cache.stats()["hits"] == 1
+
+    # child gets the same instance from the cache
+    tenant = app.child(Tenant, id="a")
+    assert tenant.parent is app
+    assert app.child("tenants/{id}", id="a") is tenant
+    assert created == ["a", "b"]
+
+    app.evict_child(Tenant, id="a")
+    assert app.child(Tenant, id="a") is not tenant
+    assert created == ["a", "b", "a"]
+
+
+def test_mount_cache_per_parent():
+    class App(morepath.App):
+        pass
+
+    class Tenant(morepath.App):
+        pass
+
+    @App.mount(path="tenant", app=Tenant, cache=morepath.LRUCache(10))
+    def get_tenant():
+        return Tenant()
+
+    App.commit()
+
+    app = App()
+    other = App()
+    assert app.child(Tenant) is app.child(Tenant)
+    assert app.child(Tenant) is not other.child(Tenant)
+    assert other.child(Tenant).parent is other
+
+
+def test_mount_cache_nested_in_uncached_mount():
+    class App(morepath.App):
+        pass
+
+    class Tenant(morepath.App):
+        def __init__(self, tid):
+            self.tid = tid
+
+    class Project(morepath.App):
+        def __init__(self, pid):
+            self.pid = pid
+
+    @Project.path(path="")
+    class ProjectRoot:
+        pass
+
+    @Project.view(model=ProjectRoot)
+    def project_default(self, request):
+        return request.link(self)
+
+    tenants = []
+    projects = []
+    cache = morepath.LRUCache(10)
+
+    @App.mount(path="tenants/{tid}", app=Tenant)
+    def get_tenant(tid):
+        tenants.append(tid)
+        return Tenant(tid)
+
+    @Tenant.mount(path="projects/{pid}", app=Project, cache=cache)
+    def get_project(pid):
+        projects.append(pid)
+        return Project(pid)
+
+    c = Client(App())
+
+    link = b"http://localhost/tenants/a/projects/x"
+    assert c.get("/tenants/a/projects/x").body == link
+    assert c.get("/tenants/a/projects/x").body == link
+    assert c.get("/tenants/b/projects/x").body == (
+        b"http://localhost/tenants/b/projects/x"
+    )
+    assert tenants == ["a", "a", "b"]
+    assert projects == ["x", "x"]
+    assert cache.stats()["hits"] == 1
+    # the cache keeps no tenant instances alive
+    for parent_key, variables in cache._items:
+        assert not isinstance(parent_key, morepath.App)
+
+
+def test_mount_cache_with_app_argument():
+    class App(morepath.App):
+        pass
+
+    class Tenant(morepath.App):
+        def __init__(self, name):
+            self.name = name
+
+    @App.mount(path="{name}", app=Tenant, cache=morepath.LRUCache(10))
+    def get_tenant(app, name):
+        return Tenant(name=name)
+
+    @Tenant.path(path="")
+    class TenantRoot:
+        pass
+
+    @Tenant.view(model=TenantRoot)
+    def tenant_default(self, request):
+        return request.link(self)
+
+    c = Client(App())
+
+    assert c.get("/foo").body == b"http://localhost/foo"
+    assert c.get("/foo").body == b"http://localhost/foo"
+
+
+def test_mount_cache_factory_returns_none():
+    class App(morepath.App):
+        pass
+
+    class Tenant(morepath.App):
+        pass
+
+    @App.mount(path="{id}", app=Tenant, cache=morepath.LRUCache(10))
+    def get_tenant(id):
+        return None
+
+    c = Client(App())
+
+    c.get("/foo", status=404)
+
+
+def test_mount_cache_request_argument():
+    class App(morepath.App):
+        pass
+
+    class Tenant(morepath.App):
+        pass
+
+    @App.mount(path="{id}", app=Tenant, cache=morepath.LRUCache(10))
+    def get_tenant(request, id):
+        return Tenant()
+
+    with pytest.raises(ConfigError):
+        App.commit()
+
+
+def test_mount_path_cached_on_app():
+    class App(morepath.App):
+        pass
+
+    class Tenant(morepath.App):
+        def __init__(self, id):
+            self.id = id
+
+    class Project(morepath.App):
+        def __init__(self, name, lang="en"):
+            self.name = name
+            self.lang = lang
+
+    class Document:
+        def __init__(self, id):
+            self.id = id
+
+    @App.mount(path="tenants/{id}", app=Tenant)
+    def get_tenant(id):
+        return Tenant(id=id)
+
+    @Tenant.mount(path="projects/{name}", app=Project)
+    def get_project(name, lang="en"):
+        return Project(name=name, lang=lang)
+
+    @Project.path(model=Document, path="documents/{id}")
+    def get_document(id):
+        return Document(id)
+
+    App.commit()
+
+    app = App()
+    tenant = app.child(Tenant, id="a")
+    project = tenant.child(Project, name="p", lang="nl")
+
+    calls = []
+    original = Tenant._get_path
+
+    def get_path(self, obj):
+        calls.append(obj)
+        return original(self, obj)
+
+    Tenant._get_path = get_path
+    try:
+        info = project._get_mounted_path(Document("1"))
+        assert info.path == "tenants/a/projects/p/documents/1"
+        assert info.parameters == {"lang": ["nl"]}
+        assert calls == [project]
+        info = project._get_mounted_path(Document("2"))
+        assert info.path == "tenants/a/projects/p/documents/2"
+        assert calls == [project]
+
+        info = project._get_mounted_class_path(Document, {"id": "3"})
+        assert info.path == "tenants/a/projects/p/documents/3"
+        assert info.parameters == {"lang": ["nl"]}
+        assert calls == [project]
+
+        # moving an ancestor elsewhere gives a new path
+        other = App().child(Tenant, id="b")
+        tenant.parent = other.parent
+        tenant.id = "b"
+        info = project._get_mounted_path(Document("1"))
+        assert info.path == "tenants/b/projects/p/documents/1"
+        assert calls == [project, project]
+
+        project.parent = None
+        assert project._get_mounted_path(Document("1")).path == "documents/1"
+    finally:
+        Tenant._get_path = original
+
+
+def test_flatten_mounts():
+    class App(morepath.App):
+        pass
+
+    @App.setting(section="routing", name="flatten_mounts")
+    def get_flatten_mounts():
+        return True
+
+    class Admin(morepath.App):
+        pass
+
+    class Users(morepath.App):
+        pass
+
+    class Tenant(morepath.App):
+        def __init__(self, id):
+            self.id = id
+
+    class Root:
+        pass
+
+    class User:
+        def __init__(self, name):
+            self.name = name
+
+    @App.path(path="", model=Root)
+    def get_root():
+        return Root()
+
+    @App.view(model=Root)
+    def root_default(self, request):
+        return "root"
+
+    created = []
+
+    @App.mount(path="admin", app=Admin)
+    def mount_admin():
+        created.append(Admin)
+        return Admin()
+
+    @App.mount(path="tenants/{id}", app=Tenant)
+    def mount_tenant(id):
+        return Tenant(id=id)
+
+    @Admin.setting(section="routing", name="flatten_mounts")
+    def get_admin_flatten_mounts():
+        return True
+
+    @Admin.path(path="", model=Root)
+    def get_admin_root():
+        return Root()
+
+    @Admin.view(model=Root)
+    def admin_default(self, request):
+        return "admin %s" % request.link(self)
+
+    @Admin.mount(path="users", app=Users)
+    def mount_users():
+        created.append(Users)
+        return Users()
+
+    @Users.path(path="all/{name}", model=User)
+    def get_user(name):
+        return User(name)
+
+    class Me(User):
+        pass
+
+    @Users.path(path="me", model=Me)
+    def get_me():
+        return Me("me")
+
+    @Users.view(model=User)
+    def user_default(self, request):
+        return "%s %s" % (self.name, request.link(self))
+
+    @Users.view(model=User, name="edit")
+    def user_edit(self, request):
+        return "edit %s" % request.app.parent.__class__.__name__
+
+    @Tenant.path(path="", model=Root)
+    def get_tenant_root():
+        return Root()
+
+    @Tenant.view(model=Root)
+    def tenant_default(self, request):
+        return "tenant %s" % request.app.id
+
+    c = Client(App())
+
+    c.get("/").mustcontain("root")
+    c.get("/admin").mustcontain("admin http://localhost/admin")
+    c.get("/admin/users/me").mustcontain("me http://localhost/admin/users/me")
+    c.get("/admin/users/me/+edit").mustcontain("edit Admin")
+    c.get("/admin/users/me/edit").mustcontain("edit Admin")
+    # routes with variables in a mounted app are still found
+    c.get("/admin/users/all/bob").mustcontain(
+        "bob http://localhost/admin/users/all/bob"
+    )
+    c.get("/tenants/a").mustcontain("tenant a")
+    c.get("/admin/users/unknown", status=404)
+
+    # the routes of the mounted apps are merged
+    path_registry = App.config.path_registry
+    assert set(path_registry.static_mounts) == {("admin",)}
+    assert ("me", "users", "admin") in path_registry._static
+    # app instances are created once per parent
+    assert created == [Admin, Users]
+    app = App()
+    admin = app.child(Admin)
+    assert admin is app.child("admin")
+    assert admin.child(Users) is admin.child(Users)
+
+
+def test_flatten_mounts_parent_routes_take_precedence():
+    class App(morepath.App):
+        pass
+
+    @App.setting(section="routing", name="flatten_mounts")
+    def get_flatten_mounts():
+        return True
+
+    class Admin(morepath.App):
+        pass
+
+    class Model:
+        def __init__(self, name):
+            self.name = name
+
+    @App.mount(path="admin", app=Admin)
+    def mount_admin():
+        return Admin()
+
+    @App.path(path="admin/{name}", model=Model)
+    def get_model(name):
+        return Model(name)
+
+    @App.view(model=Model)
+    def model_default(self, request):
+        return "parent %s" % self.name
+
+    @Admin.path(path="users", model=Model)
+    def get_users():
+        return Model("users")
+
+    @Admin.view(model=Model)
+    def admin_model_default(self, request):
+        return "admin %s" % self.name
+
+    c = Client(App())
+
+    c.get("/admin/users").mustcontain("parent users")
+    assert ("users", "admin") not in App.config.path_registry._static
+
+
+def test_flatten_mounts_disabled():
+    class App(morepath.App):
+        pass
+
+    class Admin(morepath.App):
+        pass
+
+    @App.mount(path="admin", app=Admin)
+    def mount_admin():
+        return Admin()
+
+    @Admin.path(path="")
+    class Root:
+        pass
+
+    @Admin.view(model=Root)
+    def default(self, request):
+        return "admin"
+
+    c = Client(App())
+
+    c.get("/admin").mustcontain("admin")
+    assert App.config.path_registry.static_mounts == {}
+    app = App()
+    assert app.child(Admin) is not app.child(Admin)
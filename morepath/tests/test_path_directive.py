@@ -1071,6 +1071,74 @@ def test_url_parameter_list_explicit_converter():
     assert response.body == b"[]"
 
 
+def test_url_parameter_array():
+    class app(morepath.App):
+        pass
+
+    class Model:
+        def __init__(self, item):
+            self.item = item
+
+    @app.path(
+        model=Model, path="/", converters={"item": morepath.array_of(int)}
+    )
+    def get_model(item):
+        return Model(item)
+
+    @app.view(model=Model)
+    def default(self, request):
+        return repr(self.item)
+
+    @app.view(model=Model, name="link")
+    def link(self, request):
+        return request.link(self)
+
+    c = Client(app())
+
+    response = c.get("/?item=1&item=2")
+    assert response.body == b"array('q', [1, 2])"
+
+    response = c.get("/link?item=1&item=2")
+    assert response.body == b"http://localhost/?item=1&item=2"
+
+    response = c.get("/link")
+    assert response.body == b"http://localhost/"
+
+    c.get("/?item=broken&item=1", status=400)
+    c.get("/?item=%s" % (2**64), status=400)
+
+    response = c.get("/")
+    assert response.body == b"array('q')"
+
+
+def test_url_parameter_array_uses_registered_converter():
+    class app(morepath.App):
+        pass
+
+    class Model:
+        def __init__(self, item):
+            self.item = item
+
+    @app.converter(type=int)
+    def hex_converter():
+        return Converter(lambda s: int(s, 16), lambda i: "%x" % i)
+
+    @app.path(
+        model=Model, path="/", converters={"item": morepath.array_of(int)}
+    )
+    def get_model(item):
+        return Model(item)
+
+    @app.view(model=Model)
+    def default(self, request):
+        return request.link(Model(self.item[:1]))
+
+    c = Client(app())
+
+    response = c.get("/?item=ff&item=10")
+    assert response.body == b"http://localhost/?item=ff"
+
+
 def test_url_parameter_list_unknown_explicit_converter():
     class app(morepath.App):
         pass
@@ -2273,3 +2341,108 @@ def test_named_view_on_root():
 
     response = c.get("/")
     assert response.body == b"Default view on root"
+
+
+def test_links():
+    class app(morepath.App):
+        pass
+
+    class Sub(morepath.App):
+        pass
+
+    class Document:
+        def __init__(self, id):
+            self.id = id
+
+    class Image:
+        def __init__(self, name, size):
+            self.name = name
+            self.size = size
+
+    class Item:
+        def __init__(self, id):
+            self.id = id
+
+    @app.path(model=Document, path="documents/{id}", converters={"id": int})
+    def get_document(id):
+        return Document(id)
+
+    @app.path(model=Image, path="images/{name}")
+    def get_image(name, size="small"):
+        return Image(name, size)
+
+    @app.mount(app=Sub, path="sub/{sub_id}")
+    def mount_sub(sub_id, lang="en"):
+        return Sub(sub_id, lang)
+
+    @Sub.path(model=Item, path="items/{id}")
+    def get_item(id):
+        return Item(id)
+
+    def sub_init(self, sub_id, lang):
+        self.sub_id = sub_id
+        self.lang = lang
+
+    Sub.__init__ = sub_init
+
+    class Root:
+        pass
+
+    @app.path(path="", model=Root)
+    def get_root():
+        return Root()
+
+    @app.view(model=Root)
+    def default(self, request):
+        objs = [
+            Document(1),
+            Image("a b", "large"),
+            None,
+            Document(2),
+            Image("c", None),
+        ]
+        links = request.links(objs, default="none")
+        assert links == [request.link(obj, default="none") for obj in objs]
+        assert request.links(objs, "edit") == [
+            request.link(obj, "edit") for obj in objs
+        ]
+        return "\n".join(links)
+
+    @app.view(model=Root, name="items")
+    def items(self, request):
+        sub = request.app.child(Sub("x", "nl"))
+        objs = [Item("1"), Item("2")]
+        links = request.links(objs, app=sub)
+        assert links == [request.link(obj, app=sub) for obj in objs]
+        return "\n".join(links)
+
+    @app.view(model=Root, name="unknown")
+    def unknown(self, request):
+        return request.links([Document(1), object()])
+
+    @app.view(model=Root, name="none")
+    def none(self, request):
+        return request.links([Document(1)], app=None)
+
+    c = Client(app())
+
+    response = c.get("/")
+    assert response.body == (
+        b"http://localhost/documents/1\n"
+        b"http://localhost/images/a%20b?size=large\n"
+        b"none\n"
+        b"http://localhost/documents/2\n"
+        b"http://localhost/images/c"
+    )
+
+    response = c.get("/items")
+    assert response.body == (
+        b"http://localhost/sub/x/items/1?lang=nl\n"
+        b"http://localhost/sub/x/items/2?lang=nl"
+    )
+
+    with pytest.raises(LinkError):
+        c.get("/unknown")
+
+    with pytest.raises(LinkError):
+        c.get("/none")
@@ -4,6 +4,7 @@ from webob.exc import HTTPBadRequest, HTTPFound, HTTPNotFound, HTTPOk
 from webtest import TestApp as Client
 
 import dectate
+import reg
 import morepath
 from morepath.app import App
 from morepath.publish import publish, resolve_response
@@ -402,3 +403,263 @@ def test_view_after_doesnt_apply_to_exception_view():
     response = c.get("/")
     assert response.body == b"My exception"
     assert response.headers.get("Foo") is None
+
+
+def test_compiled_views():
+    class app(morepath.App):
+        pass
+
+    class Sub(Model):
+        pass
+
+    @app.path(path="{id}", model=Model)
+    def get_model(id):
+        return Sub() if id == "sub" else Model()
+
+    @app.view(model=Model)
+    def default(self, request):
+        return "default"
+
+    @app.view(model=Model, name="edit", request_method="POST")
+    def edit(self, request):
+        return "edit"
+
+    @app.view(model=Sub, name="other")
+    def other(self, request):
+        return "other"
+
+    dectate.commit(app)
+
+    assert app.config.view_registry._views is not None
+
+    c = Client(app())
+
+    assert c.get("/foo").body == b"default"
+    assert c.post("/foo/edit").body == b"edit"
+    c.get("/foo/other", status=404)
+    c.get("/foo/edit", status=405)
+    assert c.get("/sub").body == b"default"
+    assert c.get("/sub/other").body == b"other"
+    assert c.post("/sub/edit").body == b"edit"
+    c.get("/sub/missing", status=404)
+    c.put("/sub/other", status=405)
+
+
+def test_compiled_views_model_not_found():
+    class app(morepath.App):
+        pass
+
+    class Other:
+        pass
+
+    @app.path(path="", model=Model)
+    def get_model():
+        return Model()
+
+    @app.view(model=Other)
+    def default(self, request):
+        return "default"
+
+    c = Client(app())
+
+    c.get("/", status=404)
+
+
+def test_compiled_views_custom_predicate():
+    class app(morepath.App):
+        pass
+
+    @app.predicate(
+        morepath.App.get_view,
+        name="extra",
+        default="DEFAULT",
+        index=reg.KeyIndex,
+        after=morepath.request_method_predicate,
+    )
+    def extra_predicate(self, obj, request):
+        return request.headers.get("X-Extra", "DEFAULT")
+
+    @app.path(path="", model=Model)
+    def get_model():
+        return Model()
+
+    @app.view(model=Model)
+    def default(self, request):
+        return "default"
+
+    @app.view(model=Model, extra="yes")
+    def extra(self, request):
+        return "extra"
+
+    dectate.commit(app)
+
+    assert app.config.view_registry._views is None
+
+    c = Client(app())
+
+    assert c.get("/").body == b"default"
+    assert c.get("/", headers={"X-Extra": "yes"}).body == b"extra"
+
+
+def test_reject_unknown():
+    class app(morepath.App):
+        pass
+
+    class Sub(morepath.App):
+        pass
+
+    @app.setting(section="routing", name="reject_unknown")
+    def get_reject_unknown():
+        return True
+
+    created = []
+
+    @app.path(path="")
+    class Root:
+        def __init__(self):
+            created.append(self)
+
+    @app.view(model=Root)
+    def root_default(self, request):
+        return "Root"
+
+    @app.view(model=Root, name="about")
+    def root_about(self, request):
+        return "About"
+
+    @app.path(path="documents/{id}")
+    class Document:
+        def __init__(self, id):
+            self.id = id
+
+    @app.view(model=Document)
+    def document_default(self, request):
+        return "Document %s" % self.id
+
+    class Number:
+        def __init__(self, id):
+            self.id = id
+
+    @app.path(model=Number, path="{id}", converters={"id": int})
+    def get_number(id):
+        return Number(id)
+
+    @app.view(model=Number)
+    def number_default(self, request):
+        return "Number %s" % self.id
+
+    @app.mount(path="sub", app=Sub)
+    def mount_sub():
+        return Sub()
+
+    @Sub.path(path="")
+    class SubRoot:
+        pass
+
+    @Sub.view(model=SubRoot)
+    def sub_root_default(self, request):
+        return "Sub"
+
+    c = Client(app())
+
+    assert c.get("/").body == b"Root"
+    assert c.get("/about").body == b"About"
+    assert c.get("/+about").body == b"About"
+    assert c.get("/documents/a").body == b"Document a"
+    assert c.get("/3").body == b"Number 3"
+    # the converter refuses it, so it doesn't match
+    c.get("/three", status=404)
+    assert c.get("/sub").body == b"Sub"
+    # unknown segments deeper in the path go through publishing
+    c.get("/documents/a/b/c", status=404)
+    c.get("/sub/unknown", status=404)
+    registry = app.config.path_registry
+    assert registry.rejected == 1
+    assert registry.accepted == 8
+    created[:] = []
+
+    response = c.get("/wp-admin", status=404)
+    assert response.content_type == "text/plain"
+    c.get("/.env", status=404)
+    c.get("/./wp-admin/../wp-admin", status=404)
+    assert created == []
+    assert registry.rejected == 4
+
+    # the path is normalized before it is checked
+    assert c.get("/wp-admin/../about").body == b"About"
+
+
+def test_reject_unknown_unknown_view_names():
+    class app(morepath.App):
+        pass
+
+    class Sub(morepath.App):
+        pass
+
+    @app.setting(section="routing", name="reject_unknown")
+    def get_reject_unknown():
+        return True
+
+    @app.mount(path="", app=Sub)
+    def mount_sub():
+        return Sub()
+
+    @Sub.path(path="")
+    class SubRoot:
+        pass
+
+    @Sub.view(model=SubRoot, name="about")
+    def sub_root_about(self, request):
+        return "About"
+
+    c = Client(app())
+
+    assert c.get("/about").body == b"About"
+    c.get("/wp-admin", status=404)
+    assert app.config.path_registry.rejected == 0
+
+
+def test_reject_unknown_view_on_subclass():
+    class app(morepath.App):
+        pass
+
+    class Base:
+        pass
+
+    class Mixin:
+        pass
+
+    class Sub(Base, Mixin):
+        pass
+
+    @app.setting(section="routing", name="reject_unknown")
+    def get_reject_unknown():
+        return True
+
+    @app.path(model=Base, path="")
+    def get_root():
+        return Sub()
+
+    @app.view(model=Sub, name="report")
+    def sub_report(self, request):
+        return "Report"
+
+    @app.view(model=Mixin, name="mixed")
+    def mixin_mixed(self, request):
+        return "Mixed"
+
+    c = Client(app())
+
+    assert c.get("/report").body == b"Report"
+    assert c.get("/mixed").body == b"Mixed"
+    c.get("/wp-admin", status=404)
+    assert app.config.path_registry.rejected == 1
+
+
+def test_reject_unknown_off_by_default():
+    class app(morepath.App):
+        pass
+
+    c = Client(app())
+    c.get("/wp-admin", status=404)
+    assert app.config.path_registry.rejected == 0
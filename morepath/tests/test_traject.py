@@ -2,8 +2,9 @@ import pytest
 from webob.exc import HTTPBadRequest
 
 import morepath
-from morepath.converter import IDENTITY_CONVERTER, Converter
+from morepath.converter import IDENTITY_CONVERTER, Converter, ListConverter
 from morepath.traject import (
+    CompiledNode,
     Node,
     ParameterFactory,
     Path,
@@ -11,9 +12,11 @@ from morepath.traject import (
     TrajectError,
     TrajectRegistry,
     create_path,
+    generate_create,
     is_identifier,
     normalize_path,
     parse_path,
+    parse_url_parameters,
     parse_variables,
 )
 
@@ -107,6 +110,41 @@ def test_multi_mixed_step():
     assert step.has_variables()
     assert step.discriminator_info() == "{}a{}"
 
+    variables = {}
+    assert step.match("xay", variables)
+    assert variables == {"foo": "x", "bar": "y"}
+
+    variables = {}
+    assert not step.match("xy", variables)
+    assert not variables
+
+
+def test_suffix_step():
+    step = Step("{id}.json")
+
+    variables = {}
+    assert step.match("foo.json", variables)
+    assert variables == {"id": "foo"}
+
+    # the literal part of the step is not a regular expression
+    variables = {}
+    assert not step.match("fooxjson", variables)
+    assert not variables
+
+    # a variable always matches at least one character
+    assert not step.match(".json", variables)
+    assert not variables
+
+
+def test_prefix_suffix_overlap():
+    step = Step("ab{x}ba")
+
+    variables = {}
+    assert not step.match("aba", variables)
+    assert not step.match("abba", variables)
+    assert step.match("ab.ba", variables)
+    assert variables == {"x": "."}
+
 
 def test_converter():
     step = Step("{foo}", converters=dict(foo=Converter(int)))
@@ -322,6 +360,64 @@ def test_variable_node_optional_colon():
     assert variables == {"x": "a", "y": "b"}
 
 
+def test_compiled_node():
+    node = Node()
+    foo_node = node.add(Step("foo"))
+    x_node = node.add(Step("{x}"))
+    xy_node = node.add(Step("{x}:{y}"))
+    prefix_node = node.add(Step("prefix{x}"))
+
+    compiled = node.compile()
+    assert isinstance(compiled, CompiledNode)
+
+    variables = {}
+    assert compiled.resolve("foo", variables) is compiled.name_nodes["foo"]
+    assert compiled.name_nodes["foo"].step is foo_node.step
+    assert variables == {}
+
+    variables = {}
+    assert compiled.resolve("a", variables).step is x_node.step
+    assert variables == {"x": "a"}
+
+    variables = {}
+    assert compiled.resolve("a:b", variables).step is xy_node.step
+    assert variables == {"x": "a", "y": "b"}
+
+    variables = {}
+    assert compiled.resolve("prefixa", variables).step is prefix_node.step
+    assert variables == {"x": "a"}
+
+
+def test_compiled_node_converter_fallback():
+    node = Node()
+    int_node = node.add(Step("a{x}", {"x": Converter(int)}))
+    str_node = node.add(Step("{y}"))
+
+    compiled = node.compile()
+
+    variables = {}
+    assert compiled.resolve("a1", variables).step is int_node.step
+    assert variables == {"x": 1}
+
+    # the int converter refuses, so we fall back on the next node
+    variables = {}
+    assert compiled.resolve("ab", variables).step is str_node.step
+    assert variables == {"y": "ab"}
+
+
+def test_compiled_node_no_match():
+    node = Node()
+    node.add(Step("foo"))
+    node.add(Step("a{x}", {"x": Converter(int)}))
+
+    compiled = node.compile()
+
+    variables = {}
+    assert compiled.resolve("bar", variables) is None
+    assert compiled.resolve("ab", variables) is None
+    assert variables == {}
+
+
 def req(path):
     return morepath.Request.blank(path, app=morepath.App())
 
@@ -661,6 +757,174 @@ def test_traject_consume():
     assert r.unconsumed == []
 
 
+def test_traject_compiled_on_commit():
+    class App(morepath.App):
+        pass
+
+    @App.path(path="sub/{id}")
+    class Model:
+        def __init__(self, id):
+            self.id = id
+
+    App.commit()
+
+    traject = App.config.path_registry
+    assert isinstance(traject._compiled, CompiledNode)
+
+    obj = traject.consume(req("sub/a"))
+    assert isinstance(obj, Model)
+    assert obj.id == "a"
+
+
+def test_traject_recompiled_after_add_pattern():
+    traject = TrajectRegistry()
+
+    class a:
+        pass
+
+    class b:
+        pass
+
+    traject.add_pattern("a", a)
+    assert isinstance(traject.consume(req("a")), a)
+    assert traject.consume(req("b")) is None
+
+    traject.add_pattern("b", b)
+    assert isinstance(traject.consume(req("b")), b)
+
+
+def test_traject_static_index():
+    traject = TrajectRegistry()
+
+    class health:
+        pass
+
+    class config:
+        pass
+
+    class item:
+        def __init__(self, id):
+            self.id = id
+
+    class absorbed:
+        def __init__(self, absorb):
+            self.absorb = absorb
+
+    traject.add_pattern("health", health)
+    traject.add_pattern("api/v1/config", config)
+    traject.add_pattern("api/{id}", item)
+    traject.add_pattern("files", absorbed, absorb=True)
+    traject.compile()
+
+    static = traject._static
+    assert set(static) == {
+        (),
+        ("health",),
+        ("api",),
+        ("v1", "api"),
+        ("config", "v1", "api"),
+    }
+
+    r = req("api/v1/config")
+    assert isinstance(traject.consume(r), config)
+    assert r.unconsumed == []
+
+    r = req("health/+edit")
+    assert isinstance(traject.consume(r), health)
+    assert r.unconsumed == ["+edit"]
+
+    r = req("health/edit")
+    assert isinstance(traject.consume(r), health)
+    assert r.unconsumed == ["edit"]
+
+    r = req("api/v2")
+    obj = traject.consume(r)
+    assert isinstance(obj, item)
+    assert obj.id == "v2"
+    assert r.unconsumed == []
+
+    r = req("files/a/b")
+    obj = traject.consume(r)
+    assert isinstance(obj, absorbed)
+    assert obj.absorb == "a/b"
+
+
+def test_traject_route_cache():
+    traject = TrajectRegistry(cache_size=2)
+
+    class item:
+        def __init__(self, id, b):
+            self.id = id
+            self.b = b
+
+    traject.add_pattern(
+        "a/{id}",
+        item,
+        defaults={"b": 0},
+        converters={"id": Converter(int), "b": Converter(int)},
+        required=[],
+    )
+
+    assert traject.cache is None
+    traject.compile()
+    cache = traject.cache
+
+    r = req("a/1/+edit")
+    obj = traject.consume(r)
+    assert obj.id == 1
+    assert obj.b == 0
+    assert r.unconsumed == ["+edit"]
+    assert cache.stats()["misses"] == 1
+
+    r = req("a/1/+edit?b=2")
+    obj = traject.consume(r)
+    assert obj.id == 1
+    assert obj.b == 2
+    assert r.unconsumed == ["+edit"]
+    assert cache.stats()["hits"] == 1
+
+    traject.consume(req("a/2"))
+    traject.consume(req("a/3"))
+    assert cache.stats()["evictions"] == 1
+
+    # a new route gives a new cache
+    traject.add_pattern("b", item)
+    traject.consume(req("a/1"))
+    assert traject.cache is not cache
+
+
+def test_traject_route_cache_setting():
+    class App(morepath.App):
+        pass
+
+    @App.setting(section="routing", name="cache_size")
+    def get_cache_size():
+        return 10
+
+    @App.path(path="sub/{id}")
+    class Model:
+        def __init__(self, id):
+            self.id = id
+
+    App.commit()
+
+    traject = App.config.path_registry
+    assert traject.cache.size == 10
+
+    assert traject.consume(req("sub/a")).id == "a"
+    assert traject.consume(req("sub/a")).id == "a"
+    assert traject.cache.stats()["hits"] == 1
+
+
+def test_traject_no_route_cache_by_default():
+    class App(morepath.App):
+        pass
+
+    App.commit()
+
+    assert App.config.path_registry.cache is None
+
+
 def test_traject_consume_parameter():
     class App(morepath.App):
         pass
@@ -1059,3 +1323,98 @@ def test_extra_parameters():
         "a": "foo",
         "extra_parameters": {"b": "bar"},
     }
+
+
+def test_parameters_without_request_get():
+    get_parameters = ParameterFactory({"a": None, "b": 0}, {}, [])
+    request = req("?a=foo&b=1&c=bar")
+    assert get_parameters(request) == {"a": "foo", "b": "1"}
+    assert "webob._parsed_query_vars" not in request.environ
+
+
+@pytest.mark.parametrize(
+    "query_string",
+    [
+        "",
+        "a=foo",
+        "a=foo&a=bar&b=baz",
+        "a=foo;b=bar&&c",
+        "a=&b",
+        "a=hello+world&b=%2B%26%3D",
+        "%61=encoded+name",
+        "a=%C3%A9t%C3%A9",
+        "a=100%&b=%zz",
+        "a=x=y",
+    ],
+)
+def test_parse_url_parameters(query_string):
+    request = req("?" + query_string)
+    expected = {
+        name: request.GET.getall(name)
+        for name in ["a", "b", "c"]
+        if name in request.GET
+    }
+    assert parse_url_parameters(query_string, {"a", "b", "c"}) == expected
+
+
+def test_parse_url_parameters_only_names():
+    assert parse_url_parameters("a=1&b=2&c=3", {"b"}) == {"b": ["2"]}
+    # parameters we don't know about are not decoded
+    assert parse_url_parameters("a=%ff&b=2", {"b"}) == {"b": ["2"]}
+
+
+class CustomConverter(Converter):
+    def is_missing(self, value):
+        return value == [""] or value == []
+
+
+def generic_create(parameters, converters, required, extra):
+    get_parameters = ParameterFactory(parameters, converters, required, extra)
+
+    def create(path_variables, request):
+        variables = get_parameters(request)
+        variables.update(path_variables)
+        return variables
+
+    return create
+
+
+@pytest.mark.parametrize(
+    "parameters, converters, required, extra",
+    [
+        ({}, {}, [], False),
+        ({"a": None}, {}, [], False),
+        ({"a": 0}, {"a": Converter(int)}, [], False),
+        ({"a": None}, {}, ["a"], False),
+        ({"a": []}, {"a": ListConverter(Converter(int))}, [], False),
+        ({"a": "x"}, {"a": CustomConverter(str)}, [], False),
+        ({"a": None, "extra_parameters": None}, {}, [], True),
+        ({"a": 0, "b": None}, {"a": Converter(int)}, ["b"], True),
+    ],
+)
+@pytest.mark.parametrize(
+    "query_string", ["", "?a=1", "?a=1&a=2", "?a=", "?a=x&b=y", "?c=3"]
+)
+def test_generate_create(parameters, converters, required, extra, query_string):
+    generic = generic_create(parameters, converters, required, extra)
+    generated = generate_create(
+        lambda **kw: kw, parameters, converters, required, extra
+    )
+
+    def call(create):
+        try:
+            return create({"id": "foo"}, req(query_string))
+        except HTTPBadRequest as e:
+            return str(e)
+
+    assert call(generated) == call(generic)
+
+
+def test_generate_create_request_and_app():
+    def model_factory(request, app, a=None):
+        return request, app, a
+
+    request = req("?a=A")
+    create = generate_create(model_factory, {"a": None}, code_info="info")
+    assert create({}, request) == (request, request.app, "A")
+    assert request.path_code_info == "info"
@@ -118,3 +118,56 @@ def test_view_custom_predicate_without_fallback():
     response = c.get("/")
     assert response.body == b"View"
     c.get("/foo", status=404)
+
+
+def test_view_streamed_content():
+    class App(morepath.App):
+        pass
+
+    @App.path(path="")
+    class Model:
+        pass
+
+    consumed = []
+    closed = []
+
+    def rows():
+        try:
+            for row in ["a,1\n", "b,2\n", b"c,\xe2\x82\xac\n"]:
+                consumed.append(row)
+                yield row
+        finally:
+            closed.append(True)
+
+    @App.view(model=Model)
+    def default(self, request):
+        @request.after
+        def set_header(response):
+            response.headers["X-Rows"] = "3"
+
+        return rows()
+
+    @App.html(model=Model, name="page")
+    def page(self, request):
+        return ["<p>", "caf\xe9", "</p>"]
+
+    app = App()
+    response = app.publish(morepath.Request.blank("/", app=app))
+    assert response.content_type == "text/plain"
+    assert response.headers["X-Rows"] == "3"
+    assert "Content-Length" not in response.headers
+    assert consumed == []
+    app_iter = response.app_iter
+    assert next(app_iter) == b"a,1\n"
+    assert consumed == ["a,1\n"]
+    app_iter.close()
+    assert closed == [True]
+
+    c = Client(App())
+    response = c.get("/")
+    assert response.body == "a,1\nb,2\nc,€\n".encode()
+    assert response.headers["X-Rows"] == "3"
+
+    response = c.get("/page")
+    assert response.content_type == "text/html"
+    assert response.text == "<p>caf\xe9</p>"
@@ -0,0 +1,74 @@
+import gc
+
+import morepath
+
+
+def test_warmup(monkeypatch):
+    class App(morepath.App):
+        pass
+
+    class Sub(morepath.App):
+        pass
+
+    @App.setting_section(section="routing")
+    def get_routing_settings():
+        return {"cache_size": 10}
+
+    class Model:
+        def __init__(self, id):
+            self.id = id
+
+    class SubModel(Model):
+        pass
+
+    @App.path(path="{id}", model=Model)
+    def get_model(id):
+        return Model(id)
+
+    @App.path(path="sub/{id}", model=SubModel)
+    def get_sub_model(id):
+        return SubModel(id)
+
+    @App.view(model=Model)
+    def default(self, request):
+        return "View: %s" % self.id
+
+    @App.mount(path="mounted", app=Sub)
+    def mount_sub():
+        return Sub()
+
+    frozen = []
+    monkeypatch.setattr(gc, "freeze", lambda: frozen.append(True))
+
+    app = App()
+    app.warmup(urls=["/foo"])
+
+    assert App.is_committed()
+    assert Sub.is_committed()
+    assert "publish" in app.__dict__
+    assert frozen == [True]
+
+    # the dispatch caches are filled
+    assert (Model,) in App._class_path.key_lookup.component.__self__
+    assert (Model,) in App._path_variables.key_lookup.component.__self__
+
+    # the views are prepared for the path models
+    by_class = App.config.view_registry._by_class
+    assert Model in by_class
+    assert SubModel in by_class
+
+    # the route of the url is cached
+    assert ("foo",) in App.config.path_registry.cache
+
+
+def test_warmup_without_freeze(monkeypatch):
+    class App(morepath.App):
+        pass
+
+    frozen = []
+    monkeypatch.setattr(gc, "freeze", lambda: frozen.append(True))
+
+    App().warmup(freeze=False)
+
+    assert App.is_committed()
+    assert frozen == []
@@ -30,12 +30,14 @@ https://littledev.nl/blog/2015-01-13-url-routing
 
 import re
 from functools import total_ordering
+from urllib.parse import unquote_to_bytes
 
 from webob.exc import HTTPBadRequest
 
 from reg import arginfo
 
-from .converter import IDENTITY_CONVERTER
+from .cache import LRUCache
+from .converter import IDENTITY_CONVERTER, Converter, ListConverter
 from .error import TrajectError
 
 IDENTIFIER = re.compile(r"^[^\d\W]\w*$")
@@ -71,6 +73,13 @@ class Step:
             self.converters.get(name, IDENTITY_CONVERTER) for name in self.names
         ]
         self.validate()
+        # a segment with a single variable is matched by its literal
+        # prefix and suffix, without using the regular expression
+        if len(self.names) == 1:
+            prefix, suffix = self.parts
+            self._affixes = (prefix, suffix, len(prefix), len(suffix))
+        else:
+            self._affixes = None
         self.named_interpolation_str = interpolation_str(s) % tuple(
             ("%(" + name + ")s") for name in self.names
         )
@@ -121,6 +130,37 @@ class Step:
     def match(self, s, variables):
         """Match this step with actual path segment.
 
+        :param s: path segment to match with
+        :param variables: variables dictionary to update with new converted
+          variables that are found in this segment.
+        :return: bool. The bool indicates whether ``s`` matched with
+          the step or not.
+        """
+        if not self.names:
+            return s == self.s
+        affixes = self._affixes
+        if affixes is None:
+            return self.match_re(s, variables)
+        prefix, suffix, prefix_len, suffix_len = affixes
+        end = len(s) - suffix_len
+        if (
+            end <= prefix_len
+            or not s.startswith(prefix)
+            or not s.endswith(suffix)
+        ):
+            return False
+        try:
+            value = self.cmp_converters[0].decode([s[prefix_len:end]])
+        except ValueError:
+            return False
+        variables[self.names[0]] = value
+        return True
+
+    def match_re(self, s, variables):
+        """Match this step with actual path segment using a regex.
+
+        Used by :meth:`Step.match` for segments with multiple variables.
+
         :param s: path segment to match with
         :param variables: variables dictionary to update with new converted
           variables that are found in this segment.
@@ -224,6 +264,8 @@ class Node:
         """Match a path segment, traversing this node.
 
         Matches non-variable nodes before nodes with variables in them.
+        :meth:`TrajectRegistry.find` matches in the same way on the
+        compiled tree.
 
         Updates the ``variables`` argument.
 
@@ -240,6 +282,13 @@ class Node:
                 return node
         return None
 
+    def compile(self):
+        """Compile this node and its children for fast matching.
+
+        :return: a :class:`CompiledNode` for this node.
+        """
+        return CompiledNode(self)
+
 
 class StepNode(Node):
     """A node that is also a step in that it can match.
@@ -256,6 +305,119 @@ class StepNode(Node):
         return self.step.match(segment, variables)
 
 
+class CompiledNode:
+    """A frozen node in the compiled traject tree.
+
+    Created from a :class:`Node` by :meth:`Node.compile`. Children
+    without variables are looked up in a dict, and all children with
+    variables are matched at once by a single :class:`VariableMatcher`.
+
+    :param node: the :class:`Node` to compile.
+    """
+
+    __slots__ = ("step", "name_nodes", "matcher", "absorb", "create")
+
+    def __init__(self, node):
+        self.step = getattr(node, "step", None)
+        self.name_nodes = {
+            name: child.compile() for name, child in node._name_nodes.items()
+        }
+        variable_nodes = [child.compile() for child in node._variable_nodes]
+        if variable_nodes:
+            self.matcher = VariableMatcher(variable_nodes)
+        else:
+            self.matcher = None
+        self.absorb = node.absorb
+        self.create = node.create
+
+    def resolve(self, segment, variables):
+        """Match a path segment, traversing this node.
+
+        Has the same semantics as :meth:`Node.resolve`.
+
+        :segment: a path segment
+        :variables: variables dictionary to update.
+        :return: matched node, or ``None`` if node didn't match.
+        """
+        node = self.name_nodes.get(segment)
+        if node is not None:
+            return node
+        if self.matcher is None:
+            return None
+        return self.matcher(segment, variables)
+
+
+class VariableMatcher:
+    """Match a segment against all variable children of a node at once.
+
+    If all children have a single variable, they are tried in turn
+    using the prefix and suffix matching of :meth:`Step.match`.
+    Otherwise the regular expressions of the steps are combined into a
+    single alternation that is tried in the same order as
+    :meth:`Node.resolve` tries the children. If a converter refuses
+    the matched value, the remaining children are tried one by one.
+
+    :param nodes: list of :class:`CompiledNode` instances in match order.
+    """
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+        alternatives = []
+        groups = []
+        for i, node in enumerate(nodes):
+            step = node.step
+            prefix = "v%s_" % i
+            alternatives.append(
+                "(?P<n%s>%s)" % (i, create_variables_pattern(step.s, prefix))
+            )
+            groups.append(
+                tuple(
+                    (
+                        name,
+                        prefix + name,
+                        step.converters.get(name, IDENTITY_CONVERTER),
+                    )
+                    for name in step.names
+                )
+            )
+        self.groups = groups
+        if all(node.step._affixes is not None for node in nodes):
+            self._re = None
+        else:
+            self._re = re.compile(
+                "^(?:" + "|".join(alternatives) + r")\Z", re.DOTALL
+            )
+
+    def __call__(self, segment, variables):
+        """Match segment, updating ``variables``.
+
+        :param segment: a path segment
+        :param variables: variables dictionary to update.
+        :return: matched node, or ``None`` if no node matched.
+        """
+        if self._re is None:
+            for node in self.nodes:
+                if node.step.match(segment, variables):
+                    return node
+            return None
+        matched = self._re.match(segment)
+        if matched is None:
+            return None
+        # the group wrapping the alternative closes last
+        index = int(matched.lastgroup[1:])
+        found = {}
+        try:
+            for name, group, converter in self.groups[index]:
+                found[name] = converter.decode([matched.group(group)])
+        except ValueError:
+            for node in self.nodes[index + 1 :]:
+                if node.step.match(segment, variables):
+                    return node
+            return None
+        variables.update(found)
+        return self.nodes[index]
+
+
 class Path:
     """Helper when registering paths.
 
@@ -293,10 +455,59 @@ class Path:
 
 
 class TrajectRegistry:
-    """Tree of route steps."""
+    """Tree of route steps.
 
-    def __init__(self):
+    :param cache_size: the maximum amount of paths for which the
+      resolved route is cached. If ``0``, no cache is used.
+    """
+
+    def __init__(self, cache_size=0):
         self._root = Node()
+        self._compiled = None
+        self._static = None
+        self.cache_size = cache_size
+        self.cache = None
+        """:class:`morepath.cache.LRUCache` with resolved routes.
+
+        ``None`` if no cache is in use.
+        """
+
+    def compile(self):
+        """Compile the tree of route steps for fast matching.
+
+        This is done automatically when the app is committed, and
+        again on the next :meth:`consume` if a route was added since.
+
+        Besides the compiled tree this creates an index of all nodes
+        that can be reached through segments without variables. It is
+        keyed by the reversed tuple of segments, as found in
+        :attr:`morepath.Request.unconsumed`.
+
+        A new route cache is created, so that no routes resolved with
+        the old tree are used.
+
+        :return: the root :class:`CompiledNode`.
+        """
+        root = self._root.compile()
+        static = {}
+        todo = [((), root)]
+        while todo:
+            key, node = todo.pop()
+            # an absorbing node takes all segments below it
+            if node.absorb:
+                continue
+            static[key] = node
+            for name, child in node.name_nodes.items():
+                # a segment with a + prefix is taken as a view name
+                if not name.startswith("+"):
+                    todo.append(((name,) + key, child))
+        self._static = static
+        if self.cache_size:
+            self.cache = LRUCache(self.cache_size)
+        else:
+            self.cache = None
+        self._compiled = root
+        return root
 
     def add_pattern(
         self,
@@ -332,29 +543,12 @@ class TrajectRegistry:
             if known_variables.intersection(variables):
                 raise TrajectError("Duplicate variables")
             known_variables.update(variables)
-        if defaults or converters or required or extra:
-            parameter_factory = ParameterFactory(
-                defaults, converters, required, extra
-            )
-        else:
-            parameter_factory = _simple_parameter_factory
-
-        model_args = set(arginfo(model_factory).args)
-        wants_request = "request" in model_args
-        wants_app = "app" in model_args
-
-        def create(path_variables, request):
-            variables = parameter_factory(request)
-            if wants_request:
-                variables["request"] = request
-            if wants_app:
-                variables["app"] = request.app
-            request.path_code_info = code_info
-            variables.update(path_variables)
-            return model_factory(**variables)
-
-        node.create = create
+        node.create = generate_create(
+            model_factory, defaults, converters, required, extra, code_info
+        )
         node.absorb = absorb
+        # the tree changed so any compiled version is stale
+        self._compiled = None
 
     def consume(self, request):
         """Consume a stack given route, returning object.
@@ -367,35 +561,80 @@ class TrajectRegistry:
         Then constructs the model instance given this information.
         (or :class:`morepath.App` instance in case of mounted apps).
 
+        If a route cache is in use, the node found for the path, the
+        path variables and the remaining segments are cached by path.
+        URL parameters are still converted for each request.
+
         :param request: the request to consume segments from and to
           retrieve URL parameters from.
         :return: the model instance that can be found, or ``None`` if
           no model instance exists for this sequence of segments.
         """
+        if self._compiled is None:
+            self.compile()
         stack = request.unconsumed
-        node = self._root
+        # routes without variables are found directly, possibly
+        # followed by a view name with the + prefix
+        static = self._static
+        found = static.get(tuple(stack))
+        if found is not None:
+            del stack[:]
+            return found.create({}, request)
+        if stack and stack[0].startswith("+"):
+            found = static.get(tuple(stack[1:]))
+            if found is not None:
+                del stack[1:]
+                return found.create({}, request)
+        cache = self.cache
+        if cache is None:
+            node, variables = self.find(stack)
+            return node.create(variables, request)
+        key = tuple(stack)
+        cached = cache.get(key)
+        if cached is None:
+            node, variables = self.find(stack)
+            cache.put(key, (node, variables, tuple(stack)))
+        else:
+            node, variables, remaining = cached
+            stack[:] = remaining
+        return node.create(variables, request)
+
+    def find(self, stack):
+        """Find the node for a stack of path segments.
+
+        Removes the successfully consumed path segments from ``stack``.
+
+        :param stack: a reversed list of path segments, as in
+          :attr:`morepath.Request.unconsumed`.
+        :return: a tuple with the :class:`CompiledNode` found and a dict
+          with the converted path variables.
+        """
+        node = self._compiled
+        if node is None:
+            node = self.compile()
         variables = {}
-        segment = None
         while stack:
             if node.absorb:
                 variables["absorb"] = "/".join(reversed(stack))
-                request.unconsumed = []
-                return node.create(variables, request)
+                del stack[:]
+                return node, variables
             segment = stack.pop()
             # special view prefix
             if segment.startswith("+"):
                 stack.append(segment)
-                return node.create(variables, request)
-            new_node = node.resolve(segment, variables)
+                return node, variables
+            new_node = node.name_nodes.get(segment)
+            if new_node is None and node.matcher is not None:
+                new_node = node.matcher(segment, variables)
             # could still be a view without prefix,
             # or going into a mounted app
             if new_node is None:
                 stack.append(segment)
-                return node.create(variables, request)
+                return node, variables
             node = new_node
         if node.absorb:
             variables["absorb"] = ""
-        return node.create(variables, request)
+        return node, variables
 
 
 class ParameterFactory:
@@ -405,6 +644,10 @@ class ParameterFactory:
     parameters, create a dictionary of converted URL parameters with
     Python values.
 
+    Routes use the function created by :func:`generate_create`, which
+    converts URL parameters the same way. This class is the reference
+    for it.
+
     :param parameters: dictionary of parameter names -> default values.
     :param converters: dictionary of parameter names -> converters.
     :param required: dictionary of parameter names -> required booleans.
@@ -424,9 +667,16 @@ class ParameterFactory:
         # but this parameter factory is used as we defined converters
         if not self.parameters:
             return result
-        url_parameters = request.GET
+        if self.extra:
+            url_parameters = request.GET.dict_of_lists()
+        else:
+            # only parse the parameters we know about, without
+            # building the webob MultiDict for request.GET
+            url_parameters = parse_url_parameters(
+                request.environ.get("QUERY_STRING", ""), self.parameters
+            )
         for name, default in self.parameters.items():
-            value = url_parameters.getall(name)
+            value = url_parameters.get(name, [])
             converter = self.converters.get(name, IDENTITY_CONVERTER)
             if converter.is_missing(value):
                 if name in self.required:
@@ -445,10 +695,10 @@ class ParameterFactory:
         if not self.extra:
             return result
 
-        remaining = set(url_parameters.keys()).difference(set(result.keys()))
         extra = {}
-        for name in remaining:
-            value = url_parameters.getall(name)
+        for name, value in url_parameters.items():
+            if name in result:
+                continue
             converter = self.converters.get(name, IDENTITY_CONVERTER)
             try:
                 extra[name] = converter.decode(value)
@@ -460,8 +710,190 @@ class ParameterFactory:
         return result
 
 
-def _simple_parameter_factory(request):
-    return {}
+def parse_url_parameters(query_string, names):
+    """Parse the URL parameters with the given names from a query string.
+
+    The query string is decoded like webob does for ``request.GET``,
+    but only the values of the parameters in ``names`` are decoded and
+    no MultiDict is built.
+
+    :param query_string: the ``QUERY_STRING`` of the request.
+    :param names: the names of the parameters to parse. Can be any
+      container, such as a dict or a set.
+    :return: a dict with the lists of values of the parameters found,
+      by name.
+    """
+    result = {}
+    if not query_string:
+        return result
+    query_string = query_string.encode("latin-1").replace(b"+", b" ")
+    for part in query_string.split(b"&"):
+        for name_value in part.split(b";"):
+            if not name_value:
+                continue
+            name, _, value = name_value.partition(b"=")
+            if b"%" in name:
+                name = unquote_to_bytes(name)
+            name = name.decode("utf-8", "replace")
+            if name not in names:
+                continue
+            value = unquote_to_bytes(value).decode("utf-8")
+            values = result.get(name)
+            if values is None:
+                result[name] = [value]
+            else:
+                values.append(value)
+    return result
+
+
+def generate_create(
+    model_factory,
+    parameters,
+    converters=None,
+    required=None,
+    extra=False,
+    code_info=None,
+):
+    """Generate the function that creates the model for a route.
+
+    The generated function converts the URL parameters like
+    :class:`ParameterFactory` does and then calls the model factory.
+    Its Python code is generated for the parameters of the route, so
+    that the converter functions are called directly, instead of
+    looking up the converter of each parameter for each request.
+
+    :param model_factory: the factory used to construct the model instance.
+    :param parameters: dictionary of parameter names -> default values.
+    :param converters: dictionary of parameter names -> converters.
+    :param required: list or set of required URL parameters.
+    :param extra: should extra unknown parameters be included?
+    :param code_info: :class:`dectate.CodeInfo` instance describing
+      the code line that registered this path.
+    :return: a function that takes a dict of path variables and the
+      request and returns the model instance.
+    """
+    parameters = parameters or {}
+    converters = converters or {}
+    required = set(required or ())
+    model_args = set(arginfo(model_factory).args)
+    namespace = {
+        "HTTPBadRequest": HTTPBadRequest,
+        "IDENTITY_CONVERTER": IDENTITY_CONVERTER,
+        "parse_url_parameters": parse_url_parameters,
+        "names": parameters,
+        "converters_get": converters.get,
+        "model_factory": model_factory,
+        "code_info": code_info,
+    }
+    lines = ["def create(path_variables, request):"]
+    if parameters:
+        if extra:
+            lines.append("    url_parameters = request.GET.dict_of_lists()")
+        else:
+            lines.append(
+                "    url_parameters = parse_url_parameters("
+                'request.environ.get("QUERY_STRING", ""), names)'
+            )
+    lines.append("    variables = {}")
+    for i, (name, default) in enumerate(parameters.items()):
+        converter = converters.get(name, IDENTITY_CONVERTER)
+        namespace["default_%s" % i] = default
+        namespace["converter_%s" % i] = converter
+        namespace["decode_%s" % i] = getattr(converter, "single_decode", None)
+        key = repr(name)
+        if name in required:
+            missing = "raise HTTPBadRequest(%r)" % (
+                "Required URL parameter missing: %s" % name
+            )
+        else:
+            missing = "variables[%s] = default_%s" % (key, i)
+        bad_request = "raise HTTPBadRequest(%r %% (value,))" % (
+            "Cannot decode URL parameter %s: %%s" % name
+        )
+        if _is_plain(converter, Converter):
+            if converter.single_decode is IDENTITY_CONVERTER.single_decode:
+                decoded = "value[0]"
+            else:
+                decoded = "decode_%s(value[0])" % i
+            lines.extend(
+                [
+                    "    value = url_parameters.get(%s)" % key,
+                    "    if value is None:",
+                    "        " + missing,
+                    "    elif len(value) == 1:",
+                    "        try:",
+                    "            variables[%s] = %s" % (key, decoded),
+                    "        except ValueError:",
+                    "            " + bad_request,
+                    "    else:",
+                    "        " + bad_request,
+                ]
+            )
+        elif _is_plain(converter, ListConverter):
+            namespace["decode_%s" % i] = converter.converter.single_decode
+            lines.extend(
+                [
+                    "    value = url_parameters.get(%s, [])" % key,
+                    "    try:",
+                    "        variables[%s] = [decode_%s(s) for s in value]"
+                    % (key, i),
+                    "    except ValueError:",
+                    "        " + bad_request,
+                ]
+            )
+        else:
+            lines.extend(
+                [
+                    "    value = url_parameters.get(%s, [])" % key,
+                    "    if converter_%s.is_missing(value):" % i,
+                    "        " + missing,
+                    "    else:",
+                    "        try:",
+                    "            variables[%s] = converter_%s.decode(value)"
+                    % (key, i),
+                    "        except ValueError:",
+                    "            " + bad_request,
+                ]
+            )
+    if parameters and extra:
+        lines.extend(
+            [
+                "    extra = {}",
+                "    for name, value in url_parameters.items():",
+                "        if name in names:",
+                "            continue",
+                "        converter = converters_get(name, IDENTITY_CONVERTER)",
+                "        try:",
+                "            extra[name] = converter.decode(value)",
+                "        except ValueError:",
+                "            raise HTTPBadRequest(",
+                '                f"Cannot decode URL parameter {name}: {value}"',
+                "            )",
+                '    variables["extra_parameters"] = extra',
+            ]
+        )
+    if "request" in model_args:
+        lines.append('    variables["request"] = request')
+    if "app" in model_args:
+        lines.append('    variables["app"] = request.app')
+    lines.extend(
+        [
+            "    request.path_code_info = code_info",
+            "    variables.update(path_variables)",
+            "    return model_factory(**variables)",
+        ]
+    )
+    exec(compile("\n".join(lines), "<traject create>", "exec"), namespace)
+    return namespace["create"]
+
+
+def _is_plain(converter, cls):
+    """Check that converter is a cls that decodes as cls does."""
+    return (
+        isinstance(converter, cls)
+        and type(converter).decode is cls.decode
+        and type(converter).is_missing is cls.is_missing
+    )
 
 
 def create_path(segments):
@@ -562,10 +994,26 @@ def create_variables_re(s):
     :return: a regular expression that matches with variables for the route.
     """
 
-    def _repl(m):
-        return "(?P<%s>.+)" % m.group(0)[1:-1]
+    return re.compile("^" + create_variables_pattern(s) + r"\Z", re.DOTALL)
 
-    return re.compile("^" + PATH_VARIABLE.sub(_repl, s) + "$")
+
+def create_variables_pattern(s, prefix=""):
+    """Create regular expression source that matches variables in a segment.
+
+    :param s: a route segment with variables in it.
+    :param prefix: prefix for the names of the regular expression groups.
+    :return: regular expression source with a named group for each variable.
+    """
+
+    result = []
+    parts = PATH_VARIABLE.split(s)
+    # split alternates literal parts and variable names
+    for i, part in enumerate(parts):
+        if i % 2:
+            result.append(f"(?P<{prefix}{part}>.+)")
+        else:
+            result.append(re.escape(part))
+    return "".join(result)
 
 
 def generalize_variables(s):
@@ -6,15 +6,36 @@ dict) that should be rendered *to* a response. If the view is a JSON
 view this dumps this structure as JSON. If the view is a HTML view
 this structure can be converted to HTML using a template.
 
-:func:`morepath.render_json`, :func:`morepath.render_html` and
-:func:`morepath.redirect` are members of the public API.
+:func:`morepath.render_json`, :func:`morepath.render_json_stream`,
+:func:`morepath.render_html` and :func:`morepath.redirect` are members
+of the public API.
 
 """
 
+import functools
+import inspect
+import json
+from collections.abc import Iterable, Iterator, Mapping
+
 from webob import Response as BaseResponse
 from webob.exc import HTTPForbidden, HTTPFound, HTTPNotFound
 
+from .cache import LRUCache, create_cache
 from .request import Response
+from .settings import SettingRegistry
+
+VIEW_CACHE_SIZE = 1000
+"""The amount of view lookups by predicates kept by :class:`ViewRegistry`.
+"""
+
+JSON_CHUNK_SIZE = 65536
+"""The amount of characters :func:`render_json_stream` collects before
+it passes them on as a chunk of the response body.
+"""
+
+MISSING = object()
+
+json_encoder = json.JSONEncoder(separators=(",", ":"))
 
 
 class View:
@@ -51,6 +72,7 @@ class View:
         self.permission = permission
         self.internal = internal
         self.code_info = code_info
+        self.is_async = inspect.iscoroutinefunction(func)
 
     def __call__(self, app, obj, request):
         """Render a model instance.
@@ -69,6 +91,43 @@ class View:
         :param request: the request
         :return: A :class:`webob.response.Response` instance.
         """
+        self.check(app, obj, request)
+        if self.load is not None:
+            content = self.func(obj, request, self.load(request))
+        else:
+            content = self.func(obj, request)
+        return self.respond(content, request)
+
+    async def call_async(self, app, obj, request):
+        """Render a model instance in an event loop.
+
+        Used by :meth:`morepath.App.asgi`. A view function defined with
+        ``async def`` is awaited. Other view functions are called with
+        :meth:`View.__call__` in the thread pool of the ASGI
+        application, so that they don't block the event loop.
+
+        :param obj: the model instance
+        :param request: the request
+        :return: A :class:`webob.response.Response` instance.
+        """
+        if not self.is_async:
+            # avoid circular import
+            from .asgi import run_in_thread_pool
+
+            return await run_in_thread_pool(request, self, app, obj, request)
+        self.check(app, obj, request)
+        if self.load is not None:
+            content = await self.func(obj, request, self.load(request))
+        else:
+            content = await self.func(obj, request)
+        return self.respond(content, request)
+
+    def check(self, app, obj, request):
+        """Check whether the view can be rendered.
+
+        :param obj: the model instance
+        :param request: the request
+        """
         request.view_code_info = self.code_info
         if self.internal:
             raise HTTPNotFound()
@@ -76,10 +135,14 @@ class View:
             request.identity, obj, self.permission
         ):
             raise HTTPForbidden()
-        if self.load is not None:
-            content = self.func(obj, request, self.load(request))
-        else:
-            content = self.func(obj, request)
+
+    def respond(self, content, request):
+        """Turn the content returned by the view function into a response.
+
+        :param content: content as returned by the view function.
+        :param request: the request
+        :return: A :class:`webob.response.Response` instance.
+        """
         if isinstance(content, BaseResponse):
             # the view took full control over the response
             response = content
@@ -95,13 +158,58 @@ def render_view(content, request):
     """Default render function for view if none was supplied.
 
     This just assumes the content is a string and renders it into
-    a response.
+    a response. If the content is an iterable of strings or bytes,
+    such as a generator, it is streamed as the body of the response,
+    see :func:`text_response`.
 
     :param content: content as returned by view function.
     :param request: request object
     :return: a response instance with the content.
     """
-    return Response(content, content_type="text/plain")
+    return text_response(content, "text/plain")
+
+
+def text_response(content, content_type):
+    """Make a response with a string or an iterable of strings.
+
+    An iterable that is not a string, bytes or a mapping, such as a
+    generator or a template stream, becomes the ``app_iter`` of the
+    response. Its items are encoded as they are sent, without joining
+    them first, so the response can start before the iterable is
+    exhausted. Any items may be bytes, which are sent as they are.
+
+    :param content: a string, bytes or an iterable of strings or bytes.
+    :param content_type: the content type of the response.
+    :return: a :class:`morepath.Response` instance.
+    """
+    if isinstance(content, (str, bytes, bytearray, Mapping)) or not (
+        isinstance(content, Iterable)
+    ):
+        return Response(content, content_type=content_type)
+    response = Response(content_type=content_type)
+    response.app_iter = iter_encoded(content, response.charset)
+    return response
+
+
+def iter_encoded(chunks, charset):
+    """Encode the strings in an iterable.
+
+    The iterable is closed when this iterator is, if it has a
+    ``close`` method, such as a generator.
+
+    :param chunks: an iterable of strings or bytes.
+    :param charset: the encoding to use for strings.
+    :return: an iterator of bytes.
+    """
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode(charset)
+            yield chunk
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
 
 
 def render_json(content, request):
@@ -109,28 +217,157 @@ def render_json(content, request):
 
     This respects the :meth:`morepath.App.dump_json` directive that
     can be used to serialize any object to JSON. By default this
-    serializes Python objects like dicts, strings to JSON.
+    serializes Python objects like dicts, strings to JSON. The JSON
+    is encoded by the :class:`morepath.encoder.JsonEncoderRegistry`
+    of the app, which can be configured with settings.
 
     :param content: content as returned from view function.
     :param request: a :class:`morepath.Request` instance.
     :return: a :class:`morepath.Response` instance with a serialized
       JSON body.
     """
+    app = request.app
+    return Response(
+        body=app.config.json_encoder_registry.encode(app, content, request),
+        content_type="application/json",
+    )
+
+
+def render_json_stream(content, request):
+    """Take content with iterators and return a streamed json response.
+
+    Like :func:`morepath.render_json`, but the JSON is encoded while
+    the response body is sent, in chunks of about
+    :data:`JSON_CHUNK_SIZE` characters. An iterator, such as a
+    generator, is encoded as a JSON array. Iterators can also be
+    contained in lists and dicts, at any level.
+
+    The :meth:`morepath.App.dump_json` directive is respected for the
+    content, for each item of an iterator, and for any other object that
+    cannot be encoded as JSON otherwise.
+
+    Because the content is encoded after the view has returned, the
+    tweens are done before the iterators are consumed.
+
+    :param content: content as returned from view function.
+    :param request: a :class:`morepath.Request` instance.
+    :return: a :class:`morepath.Response` instance with a streamed
+      JSON body.
+    """
+    app = request.app
+    registry = app.config.json_encoder_registry
+    dump_json = functools.partial(registry.dump, app)
+    obj = dump_json(content, request)
     return Response(
-        json_body=request.app._dump_json(content, request),
+        app_iter=iter_chunks(
+            iter_json(obj, dump_json, request, registry.encode_text),
+            JSON_CHUNK_SIZE,
+        ),
         content_type="application/json",
     )
 
 
+def iter_json(obj, dump_json, request, encode=json_encoder.encode):
+    """Encode an object to JSON incrementally.
+
+    Lists and dicts that don't contain iterators or objects that need
+    :meth:`morepath.App.dump_json` are encoded at once.
+
+    :param obj: the object to encode.
+    :param dump_json: a function that takes an object and the request
+      and dumps it, like :meth:`morepath.App._dump_json`.
+    :param request: a :class:`morepath.Request` instance.
+    :param encode: a function that encodes an object to a JSON string,
+      or raises :exc:`TypeError`.
+    :return: an iterator of strings that together are the JSON.
+    """
+    if isinstance(obj, Iterator):
+        yield "["
+        first = True
+        for item in obj:
+            if first:
+                first = False
+            else:
+                yield ","
+            yield from iter_json(
+                dump_json(item, request), dump_json, request, encode
+            )
+        yield "]"
+        return
+    try:
+        yield encode(obj)
+        return
+    except TypeError:
+        pass
+    if isinstance(obj, dict):
+        yield "{"
+        first = True
+        for key, value in obj.items():
+            if first:
+                first = False
+            else:
+                yield ","
+            if not isinstance(key, str):
+                # convert the key like the encoder does, so that
+                # numbers become strings
+                (key,) = json.loads(encode({key: 0}))
+            yield encode(key)
+            yield ":"
+            yield from iter_json(value, dump_json, request, encode)
+        yield "}"
+    elif isinstance(obj, (list, tuple)):
+        yield "["
+        first = True
+        for item in obj:
+            if first:
+                first = False
+            else:
+                yield ","
+            yield from iter_json(item, dump_json, request, encode)
+        yield "]"
+    else:
+        dumped = dump_json(obj, request)
+        if dumped is obj:
+            raise TypeError(
+                "Object of type %s is not JSON serializable"
+                % obj.__class__.__name__
+            )
+        yield from iter_json(dumped, dump_json, request, encode)
+
+
+def iter_chunks(strings, size):
+    """Collect strings into UTF-8 encoded chunks.
+
+    :param strings: an iterator of strings.
+    :param size: the amount of characters after which a chunk is made.
+    :return: an iterator of bytes.
+    """
+    collected = []
+    length = 0
+    for s in strings:
+        collected.append(s)
+        length += len(s)
+        if length >= size:
+            yield "".join(collected).encode("utf-8")
+            collected = []
+            length = 0
+    if collected:
+        yield "".join(collected).encode("utf-8")
+
+
 def render_html(content, request):
     """Take string and return text/html response.
 
+    The content can also be an iterable of strings or bytes, such as a
+    generator or a template stream, which is streamed as the body of
+    the response, see :func:`text_response`.
+
     :param content: contnet as returned from view function.
     :param request: a :class:`morepath.Request` instance.
     :return: a :class:`morepath.Response` instance with ``content``
       as the body.
     """
-    return Response(content, content_type="text/html")
+    return text_response(content, "text/html")
 
 
 def redirect(location):
@@ -141,3 +378,244 @@ def redirect(location):
       return this from a view to redirect.
     """
     return HTTPFound(location=location)
+
+
+class ViewRegistry:
+    """Compiled lookup of the views of an app class.
+
+    :meth:`morepath.App.get_view` computes a dispatch key from the view
+    predicates and looks it up with Reg. When only the built-in
+    ``model``, ``name`` and ``request_method`` predicates are installed,
+    this registry compiles the registered views into nested dicts
+    instead, so that publishing finds a view by model class, view name
+    and request method directly. With custom predicates installed it
+    uses :meth:`morepath.App.get_view`.
+
+    The fallbacks of the predicates are used when no view can be
+    found, so this gives the same 404 Not Found and 405 Method Not
+    Allowed responses.
+
+    The views that :meth:`morepath.Request.view` looks up by predicates
+    are cached in a :class:`morepath.LRUCache` of
+    :data:`VIEW_CACHE_SIZE` items, which is cleared when the views are
+    compiled again.
+
+    The views compiled for a model class are kept by class. If the
+    ``cache_size`` setting in the ``dispatch`` section is set, this is
+    bounded to that amount of classes.
+
+    :param setting_registry: a
+      :class:`morepath.directive.SettingRegistry` instance
+    """
+
+    factory_arguments = {"setting_registry": SettingRegistry}
+
+    app_class_arg = True
+
+    def __init__(self, app_class, setting_registry):
+        self.app_class = app_class
+        self.setting_registry = setting_registry
+        self._registry = None
+        self._size = 0
+        self._views = None
+        self._by_class = create_cache(None)
+        self.cache = LRUCache(VIEW_CACHE_SIZE)
+
+    def compile(self):
+        """Compile the views registered for :meth:`morepath.App.get_view`.
+
+        This is called at the end of configuration. The views are
+        compiled again when views are registered afterward.
+        """
+        dispatch = self.app_class.get_view
+        registry = dispatch.key_lookup.key_lookup
+        self._views = None
+        dispatch = getattr(self.setting_registry, "dispatch", None)
+        self._by_class = create_cache(getattr(dispatch, "cache_size", 0))
+        self.cache.clear()
+        self._registry = registry
+        self._size = len(registry.known_keys)
+        if not is_compilable(registry):
+            return
+        views = {}
+        for key in registry.known_keys:
+            model, name, request_method = key
+            (view,) = registry.get(key)
+            views.setdefault(model, {}).setdefault(name, {})[
+                request_method
+            ] = view
+        self._fallbacks = [
+            index.fallback or dispatch.wrapped_func
+            for index in registry.indexes
+        ]
+        self._views = views
+
+    def get_view(self, app, obj, request):
+        """Get the view for obj in the context of a request.
+
+        :param app: the :class:`morepath.App` instance.
+        :param obj: model object to represent with view.
+        :param request: :class:`morepath.Request` instance.
+        :return: :class:`morepath.Response` object, or
+          :class:`webob.exc.HTTPNotFound` if view cannot be found.
+        """
+        self._check()
+        if self._views is None:
+            return app.get_view(obj, request)
+        return self._find_view(obj, request)(app, obj, request)
+
+    def find_view(self, app, obj, request):
+        """Find the view for obj in the context of a request.
+
+        Like :meth:`ViewRegistry.get_view`, but the view is returned
+        instead of called.
+
+        :param app: the :class:`morepath.App` instance.
+        :param obj: model object to represent with view.
+        :param request: :class:`morepath.Request` instance.
+        :return: a :class:`View`, or a predicate fallback function. Both
+          take the app, obj and request as arguments.
+        """
+        self._check()
+        if self._views is None:
+            entry = app.get_view.by_args(obj, request)
+            return (
+                entry.component
+                or entry.fallback
+                or self.app_class.get_view.wrapped_func
+            )
+        return self._find_view(obj, request)
+
+    def _find_view(self, obj, request):
+        model = obj.__class__
+        views, first = self._model_views(model)
+        try:
+            return views[request.view_name][request.method]
+        except KeyError:
+            return self._fallback(first, request.view_name)
+
+    def view_names(self, model):
+        """Get the names of the views registered for a model class.
+
+        :param model: the model class, views registered for its base
+          classes are included.
+        :return: a dict with the view names as keys, or ``None`` if
+          the views cannot be compiled, so the names are not known.
+        """
+        self._check()
+        if self._views is None:
+            return None
+        views, first = self._model_views(model)
+        return views
+
+    def by_predicates(self, predicates):
+        """Get the view registered for predicates.
+
+        Like ``get_view.by_predicates(**predicates).component``, but
+        the view found is cached by the predicates.
+
+        :param predicates: a dict with the values of the view
+          predicates, such as ``model`` and ``name``.
+        :return: the :class:`View` registered, or ``None``.
+        """
+        self._check()
+        key = tuple(predicates.items())
+        try:
+            result = self.cache.get(key, MISSING)
+        except TypeError:
+            # unhashable predicate values are not cached
+            return self.app_class.get_view.by_predicates(**predicates).component
+        if result is MISSING:
+            result = self.app_class.get_view.by_predicates(
+                **predicates
+            ).component
+            self.cache.put(key, result)
+        return result
+
+    def _check(self):
+        """Compile again if views were registered since compiling."""
+        registry = self.app_class.get_view.key_lookup.key_lookup
+        if (
+            registry is not self._registry
+            or len(registry.known_keys) != self._size
+        ):
+            self.compile()
+
+    def warmup(self, models=()):
+        """Compile the views and prepare them for model classes.
+
+        Publishing prepares the views for a model class the first time
+        an instance of it is published. This does so in advance for the
+        model classes that views are registered for and for ``models``.
+
+        :param models: additional model classes, such as those of
+          subclasses of the classes that views are registered for.
+        """
+        self.compile()
+        if self._views is None:
+            return
+        for model in list(self._views) + list(models):
+            if model not in self._by_class:
+                self._by_class.put(model, self._class_views(model))
+
+    def _model_views(self, model):
+        """Get the views for a model class, compiling them if needed."""
+        result = self._by_class.get(model)
+        if result is None:
+            result = self._class_views(model)
+            self._by_class.put(model, result)
+        return result
+
+    def _class_views(self, model):
+        """Merge the views of model and its base classes.
+
+        :return: a tuple with a dict of view name to a dict of request
+          method to view, and the views registered on the first class
+          in the mro that has any, or ``None``.
+        """
+        result = {}
+        first = None
+        for cls in model.__mro__:
+            views = self._views.get(cls)
+            if views is None:
+                continue
+            if first is None:
+                first = views
+            for name, methods in views.items():
+                merged = result.setdefault(name, {})
+                for request_method, view in methods.items():
+                    merged.setdefault(request_method, view)
+        return result, first
+
+    def _fallback(self, first, name):
+        model_fallback, name_fallback, method_fallback = self._fallbacks
+        if first is None:
+            return model_fallback
+        if name not in first:
+            return name_fallback
+        return method_fallback
+
+
+def is_compilable(registry):
+    """Check whether the views in a Reg registry can be compiled.
+
+    :param registry: the :class:`reg.PredicateRegistry` of
+      :meth:`morepath.App.get_view`.
+    :return: ``True`` if only the built-in view predicates are installed
+      and every view is registered once.
+    """
+    from .core import (
+        model_predicate,
+        name_predicate,
+        request_method_predicate,
+    )
+
+    funcs = [
+        getattr(predicate.get_key, "func", None)
+        for predicate in registry.predicates
+    ]
+    return funcs == [
+        model_predicate,
+        name_predicate,
+        request_method_predicate,
+    ] and len(registry.known_values) == len(registry.known_keys)